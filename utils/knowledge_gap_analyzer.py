@@ -8,12 +8,16 @@ import logging
 import time
 import sqlite3
 import math
+import queue
+import threading
+import atexit
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Tuple, Any, Union, Set
 from collections import defaultdict, deque
 from enum import Enum
 import numpy as np
+from functools import cached_property, partial
 
 from .knowledge_graph import get_knowledge_graph_engine, SemanticRelation, ConceptNode
 from .adaptive_learning import (
@@ -24,6 +28,62 @@ from .event_system import publish_event, register_event_handler, VocabMasterEven
 
 logger = logging.getLogger(__name__)
 
+# 紧凑JSON序列化：去掉分隔符空格并直接保留中文，减小行体积
+_jdumps = partial(json.dumps, separators=(',', ':'), ensure_ascii=False)
+
+# 先决条件递归展开的上限：单个概念的依赖数超过该值即停止展开，
+# 且每次顶层分析最多展开 MAX_PREREQUISITE_VISITS 个概念
+MAX_PREREQUISITE_FANOUT = 64
+MAX_PREREQUISITE_VISITS = 512
+
+# 推荐学习方法表（按学习风格 / 缺口类型）
+_VISUAL_METHODS = frozenset({'概念图学习', '视觉记忆法', '图表总结'})
+_AUDITORY_METHODS = frozenset({'朗读学习', '听力练习', '音频复习'})
+_KINESTHETIC_METHODS = frozenset({'互动练习', '实践应用', '角色扮演'})
+_READING_METHODS = frozenset({'深度阅读', '笔记总结', '文本分析'})
+_STYLE_METHODS = {
+    'visual': _VISUAL_METHODS,
+    'auditory': _AUDITORY_METHODS,
+    'kinesthetic': _KINESTHETIC_METHODS,
+    'reading': _READING_METHODS,
+}
+_VOCAB_METHODS = frozenset({'词汇卡片', '词根词缀学习', '语境记忆'})
+_PREREQ_METHODS = frozenset({'递进式学习', '依赖关系图', '逐步构建'})
+_SEMANTIC_METHODS = frozenset({'关联学习', '语义网络', '类比学习'})
+_DEFAULT_METHODS = frozenset({'间隔重复', '主动回忆', '交错练习'})
+
+# 推荐练习活动表（按缺口类型）
+_VOCAB_ACTIVITIES = frozenset({'词汇填空练习', '词义选择题', '同义词反义词练习'})
+_PREREQ_ACTIVITIES = frozenset({'概念顺序排列', '逻辑关系判断', '前置条件检查'})
+_MASTERY_ACTIVITIES = frozenset({'强化训练练习', '错题重做', '速度训练'})
+_SEMANTIC_ACTIVITIES = frozenset({'词汇关系配对', '语义相似度判断', '概念分类练习'})
+_COMMON_ACTIVITIES = frozenset({'综合应用题', '情境对话练习', '创造性写作'})
+
+# 基于间隔重复原理的复习间隔（天数），所有概念共享同一份不可变序列
+_REVIEW_INTERVALS = (1, 3, 7, 14)
+_FALLBACK_REVIEW_INTERVALS = (1, 3, 7)
+
+# 热写入语句；保持字符串不变，sqlite3的语句缓存即可复用已编译的语句
+_SQL_INSERT_GAP = '''
+    INSERT OR REPLACE INTO knowledge_gaps VALUES
+    (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+_SQL_INSERT_PLAN = '''
+    INSERT OR REPLACE INTO remediation_plans VALUES
+    (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+_SQL_UPDATE_GAP = '''
+    UPDATE knowledge_gaps SET
+    missing_concepts = ?, weak_concepts = ?, resolution_status = ?, last_updated = ?
+    WHERE gap_id = ?
+'''
+
+# 缺口更新的写后缓冲：最多等待该时长（秒）或积累到该条数后批量提交
+_WRITE_BEHIND_INTERVAL = 0.5
+_WRITE_BEHIND_BATCH_SIZE = 64
+# 写后队列容量上限，写入跟不上时事件处理阻塞等待，内存占用有界
+_WRITE_BEHIND_QUEUE_SIZE = 4096
+
 
 class GapType(Enum):
     """知识缺口类型"""
@@ -44,6 +104,31 @@ class GapSeverity(Enum):
     MINOR = "minor"          # 轻微 - 优化性质
 
 
+# 热路径使用的枚举成员别名，省去每次的类属性查找
+_GT_VOCAB = GapType.VOCABULARY_GAP
+_GT_PREREQ = GapType.PREREQUISITE_GAP
+_GT_MASTERY = GapType.MASTERY_GAP
+_GT_SEMANTIC = GapType.SEMANTIC_GAP
+_GS_CRITICAL = GapSeverity.CRITICAL
+_GS_HIGH = GapSeverity.HIGH
+
+# 严重程度 -> 优先级基础权重
+_SEVERITY_WEIGHTS = {
+    GapSeverity.CRITICAL: 10,
+    GapSeverity.HIGH: 8,
+    GapSeverity.MEDIUM: 6,
+    GapSeverity.LOW: 4,
+    GapSeverity.MINOR: 2
+}
+
+# 报告聚合的向量化路径：缺口数达到该阈值时改用NumPy结构数组(SoA)统计
+_VECTORIZE_MIN_GAPS = 256
+_GAP_TYPES = tuple(GapType)
+_GAP_SEVERITIES = tuple(GapSeverity)
+_GAP_TYPE_CODES = {gap_type: code for code, gap_type in enumerate(_GAP_TYPES)}
+_GAP_SEVERITY_CODES = {severity: code for code, severity in enumerate(_GAP_SEVERITIES)}
+
+
 @dataclass
 class KnowledgeGap:
     """知识缺口"""
@@ -53,8 +138,8 @@ class KnowledgeGap:
     severity: GapSeverity
     
     # 缺口内容
-    missing_concepts: List[str] = field(default_factory=list)
-    weak_concepts: List[str] = field(default_factory=list)
+    missing_concepts: Set[str] = field(default_factory=set)
+    weak_concepts: Set[str] = field(default_factory=set)
     prerequisite_concepts: List[str] = field(default_factory=list)
     
     # 影响分析
@@ -78,8 +163,8 @@ class KnowledgeGap:
             'user_id': self.user_id,
             'gap_type': self.gap_type.value,
             'severity': self.severity.value,
-            'missing_concepts': self.missing_concepts,
-            'weak_concepts': self.weak_concepts,
+            'missing_concepts': sorted(self.missing_concepts),
+            'weak_concepts': sorted(self.weak_concepts),
             'prerequisite_concepts': self.prerequisite_concepts,
             'blocking_concepts': self.blocking_concepts,
             'impact_score': self.impact_score,
@@ -93,6 +178,31 @@ class KnowledgeGap:
         }
 
 
+@dataclass
+class GapArrays:
+    """缺口数值字段的列式存储，供大批量报告聚合使用
+
+    这些字段在检测后不再变化，因此只需在检测时构建一次。
+    """
+    type_codes: np.ndarray
+    severity_codes: np.ndarray
+    priorities: np.ndarray
+    impact_scores: np.ndarray
+    confidences: np.ndarray
+    times_to_fix: np.ndarray
+    
+    @classmethod
+    def from_gaps(cls, gaps: List[KnowledgeGap]) -> 'GapArrays':
+        return cls(
+            type_codes=np.fromiter((_GAP_TYPE_CODES[g.gap_type] for g in gaps), np.int8, len(gaps)),
+            severity_codes=np.fromiter((_GAP_SEVERITY_CODES[g.severity] for g in gaps), np.int8, len(gaps)),
+            priorities=np.fromiter((g.remediation_priority for g in gaps), np.int64, len(gaps)),
+            impact_scores=np.fromiter((g.impact_score for g in gaps), np.float64, len(gaps)),
+            confidences=np.fromiter((g.confidence for g in gaps), np.float64, len(gaps)),
+            times_to_fix=np.fromiter((g.estimated_time_to_fix for g in gaps), np.float64, len(gaps))
+        )
+
+
 @dataclass
 class LearningDependency:
     """学习依赖关系"""
@@ -122,7 +232,7 @@ class RemediationPlan:
     # 个性化建议
     study_methods: List[str] = field(default_factory=list)
     practice_activities: List[str] = field(default_factory=list)
-    review_schedule: Dict[str, List[int]] = field(default_factory=dict)  # 词汇 -> 复习间隔
+    review_schedule: Dict[str, Tuple[int, ...]] = field(default_factory=dict)  # 词汇 -> 复习间隔
     
     # 进度跟踪
     completion_percentage: float = 0.0
@@ -295,11 +405,22 @@ class ConceptPrerequisiteAnalyzer:
         self.knowledge_graph = knowledge_graph
         self.dependency_cache = {}
         
-    def analyze_prerequisites(self, concept: str, max_depth: int = 3) -> List[LearningDependency]:
-        """分析概念的先决条件"""
+    def analyze_prerequisites(self, concept: str, max_depth: int = 3,
+                              _budget: Optional[List[int]] = None) -> List[LearningDependency]:
+        """分析概念的先决条件
+
+        _budget 为递归共享的剩余展开次数，耗尽后不再继续展开，
+        以避免高连接度概念造成的指数级递归。
+        """
         if concept in self.dependency_cache:
             return self.dependency_cache[concept]
         
+        if _budget is None:
+            _budget = [MAX_PREREQUISITE_VISITS]
+        if _budget[0] <= 0:
+            return []
+        _budget[0] -= 1
+        
         dependencies = []
         
         try:
@@ -320,11 +441,21 @@ class ConceptPrerequisiteAnalyzer:
                     )
                     dependencies.append(dependency)
             
-            # 递归分析（限制深度）
+            # 递归分析（限制深度、扇出和总展开次数）
+            truncated = False
             if max_depth > 1:
-                for dep in dependencies[:]:  # 复制列表避免修改问题
+                # 优先展开最强的依赖，使预算花在最有价值的先决条件上
+                direct_dependencies = sorted(
+                    dependencies, key=lambda d: d.dependency_strength, reverse=True
+                )[:MAX_PREREQUISITE_FANOUT]
+                
+                for dep in direct_dependencies:
+                    if len(dependencies) > MAX_PREREQUISITE_FANOUT or _budget[0] <= 0:
+                        truncated = True
+                        break
+                    
                     sub_dependencies = self.analyze_prerequisites(
-                        dep.prerequisite, max_depth - 1
+                        dep.prerequisite, max_depth - 1, _budget
                     )
                     for sub_dep in sub_dependencies:
                         # 传递依赖强度衰减
@@ -339,7 +470,9 @@ class ConceptPrerequisiteAnalyzer:
                             )
                             dependencies.append(transitive_dep)
             
-            self.dependency_cache[concept] = dependencies
+            # 预算耗尽时的结果不完整，不写入缓存
+            if not truncated and _budget[0] > 0:
+                self.dependency_cache[concept] = dependencies
             return dependencies
             
         except Exception as e:
@@ -445,7 +578,7 @@ class KnowledgeGapDetector:
                 user_id=user_id,
                 gap_type=GapType.VOCABULARY_GAP,
                 severity=self._assess_vocabulary_gap_severity(missing_concepts, target_concepts),
-                missing_concepts=missing_concepts,
+                missing_concepts=set(missing_concepts),
                 confidence=0.9,  # 词汇缺口容易确定
                 recommended_actions=[
                     f"学习{len(missing_concepts)}个新词汇",
@@ -483,8 +616,8 @@ class KnowledgeGapDetector:
                     user_id=user_id,
                     gap_type=GapType.PREREQUISITE_GAP,
                     severity=self._assess_prerequisite_gap_severity(missing_prerequisites, weak_prerequisites),
-                    missing_concepts=missing_prerequisites,
-                    weak_concepts=weak_prerequisites,
+                    missing_concepts=set(missing_prerequisites),
+                    weak_concepts=set(weak_prerequisites),
                     prerequisite_concepts=[dep.prerequisite for dep in dependencies],
                     blocking_concepts=[concept],
                     confidence=0.7,
@@ -512,7 +645,7 @@ class KnowledgeGapDetector:
                 user_id=user_id,
                 gap_type=GapType.MASTERY_GAP,
                 severity=self._assess_mastery_gap_severity(weak_concepts, mastery_data),
-                weak_concepts=weak_concepts,
+                weak_concepts=set(weak_concepts),
                 confidence=0.8,
                 recommended_actions=[
                     "加强薄弱概念的练习",
@@ -557,7 +690,7 @@ class KnowledgeGapDetector:
                     user_id=user_id,
                     gap_type=GapType.SEMANTIC_GAP,
                     severity=GapSeverity.MEDIUM,
-                    weak_concepts=weak_connections,
+                    weak_concepts=set(weak_connections),
                     confidence=0.6,
                     recommended_actions=[
                         "学习相关概念建立语义连接",
@@ -612,7 +745,7 @@ class KnowledgeGapDetector:
             return GapSeverity.MINOR
         
         # 计算平均掌握度
-        avg_mastery = np.mean([mastery_data[concept].mastery_level for concept in weak_concepts])
+        avg_mastery = sum(mastery_data[concept].mastery_level for concept in weak_concepts) / len(weak_concepts)
         
         if avg_mastery < 0.3:
             return GapSeverity.CRITICAL
@@ -644,17 +777,8 @@ class KnowledgeGapDetector:
     
     def _calculate_gap_priorities(self, gaps: List[KnowledgeGap], target_concepts: List[str]):
         """计算缺口优先级"""
-        # 严重程度权重
-        severity_weights = {
-            GapSeverity.CRITICAL: 10,
-            GapSeverity.HIGH: 8,
-            GapSeverity.MEDIUM: 6,
-            GapSeverity.LOW: 4,
-            GapSeverity.MINOR: 2
-        }
-        
         for gap in gaps:
-            base_priority = severity_weights[gap.severity]
+            base_priority = _SEVERITY_WEIGHTS[gap.severity]
             
             # 影响范围调整
             impact_factor = len(gap.blocking_concepts) / max(1, len(target_concepts))
@@ -810,99 +934,62 @@ class RemediationPlanGenerator:
             
             if style_indicators:
                 dominant_style = style_indicators[0].style
-                
-                if dominant_style.value == 'visual':
-                    methods.update(['概念图学习', '视觉记忆法', '图表总结'])
-                elif dominant_style.value == 'auditory':
-                    methods.update(['朗读学习', '听力练习', '音频复习'])
-                elif dominant_style.value == 'kinesthetic':
-                    methods.update(['互动练习', '实践应用', '角色扮演'])
-                elif dominant_style.value == 'reading':
-                    methods.update(['深度阅读', '笔记总结', '文本分析'])
+                methods |= _STYLE_METHODS.get(dominant_style.value, frozenset())
         except:
             pass
         
         # 根据缺口类型推荐
         gap_types = set(gap.gap_type for gap in gaps)
         
-        if GapType.VOCABULARY_GAP in gap_types:
-            methods.update(['词汇卡片', '词根词缀学习', '语境记忆'])
+        if _GT_VOCAB in gap_types:
+            methods |= _VOCAB_METHODS
         
-        if GapType.PREREQUISITE_GAP in gap_types:
-            methods.update(['递进式学习', '依赖关系图', '逐步构建'])
+        if _GT_PREREQ in gap_types:
+            methods |= _PREREQ_METHODS
         
-        if GapType.SEMANTIC_GAP in gap_types:
-            methods.update(['关联学习', '语义网络', '类比学习'])
+        if _GT_SEMANTIC in gap_types:
+            methods |= _SEMANTIC_METHODS
         
         # 默认方法
         if not methods:
-            methods.update(['间隔重复', '主动回忆', '交错练习'])
+            methods |= _DEFAULT_METHODS
         
         return list(methods)
     
     def _recommend_practice_activities(self, gaps: List[KnowledgeGap]) -> List[str]:
         """推荐练习活动"""
-        activities = set()
+        activities = set(_COMMON_ACTIVITIES)  # 通用活动
         
         gap_types = set(gap.gap_type for gap in gaps)
         
-        if GapType.VOCABULARY_GAP in gap_types:
-            activities.update([
-                '词汇填空练习',
-                '词义选择题',
-                '同义词反义词练习'
-            ])
-        
-        if GapType.PREREQUISITE_GAP in gap_types:
-            activities.update([
-                '概念顺序排列',
-                '逻辑关系判断',
-                '前置条件检查'
-            ])
-        
-        if GapType.MASTERY_GAP in gap_types:
-            activities.update([
-                '强化训练练习',
-                '错题重做',
-                '速度训练'
-            ])
-        
-        if GapType.SEMANTIC_GAP in gap_types:
-            activities.update([
-                '词汇关系配对',
-                '语义相似度判断',
-                '概念分类练习'
-            ])
-        
-        # 通用活动
-        activities.update([
-            '综合应用题',
-            '情境对话练习',
-            '创造性写作'
-        ])
+        if _GT_VOCAB in gap_types:
+            activities |= _VOCAB_ACTIVITIES
         
-        return list(activities)
-    
-    def _generate_review_schedule(self, sequence: List[str]) -> Dict[str, List[int]]:
-        """生成复习计划"""
-        schedule = {}
+        if _GT_PREREQ in gap_types:
+            activities |= _PREREQ_ACTIVITIES
         
-        # 基于间隔重复原理
-        intervals = [1, 3, 7, 14, 30, 60]  # 天数
+        if _GT_MASTERY in gap_types:
+            activities |= _MASTERY_ACTIVITIES
         
-        for concept in sequence:
-            schedule[concept] = intervals[:4]  # 前4个间隔
+        if _GT_SEMANTIC in gap_types:
+            activities |= _SEMANTIC_ACTIVITIES
         
-        return schedule
+        return list(activities)
+    
+    def _generate_review_schedule(self, sequence: List[str]) -> Dict[str, Tuple[int, ...]]:
+        """生成复习计划"""
+        return {concept: _REVIEW_INTERVALS for concept in sequence}
     
     def _generate_fallback_plan(self, user_id: str, gaps: List[KnowledgeGap]) -> RemediationPlan:
         """生成后备补救计划"""
         all_concepts = []
+        extend = all_concepts.extend
         for gap in gaps:
-            all_concepts.extend(gap.missing_concepts)
-            all_concepts.extend(gap.weak_concepts)
+            extend(sorted(gap.missing_concepts))
+            extend(sorted(gap.weak_concepts))
         
-        all_concepts = list(set(all_concepts))
+        # 保持首次出现的顺序去重，使里程碑选择在多次运行间稳定
+        all_concepts = list(dict.fromkeys(all_concepts))
         
         return RemediationPlan(
             user_id=user_id,
@@ -915,7 +1002,7 @@ class RemediationPlanGenerator:
             estimated_completion_days=math.ceil(len(all_concepts) * 15.0 / 25.0),
             study_methods=['间隔重复', '主动回忆'],
             practice_activities=['词汇练习', '应用练习'],
-            review_schedule={concept: [1, 3, 7] for concept in all_concepts}
+            review_schedule={concept: _FALLBACK_REVIEW_INTERVALS for concept in all_concepts}
         )
 
 
@@ -925,18 +1012,25 @@ class KnowledgeGapAnalysisEngine:
     def __init__(self, db_path: str = "data/knowledge_gaps.db"):
         self.db_path = db_path
         
-        # 组件初始化
-        self.knowledge_graph = get_knowledge_graph_engine()
-        self.learning_manager = get_adaptive_learning_manager()
-        self.predictive_engine = get_predictive_intelligence_engine()
+        # 长连接复用，避免每次读写重新打开数据库；autocommit模式下显式控制事务
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
         
-        self.gap_detector = KnowledgeGapDetector(self.knowledge_graph, self.learning_manager)
-        self.plan_generator = RemediationPlanGenerator(
-            self.knowledge_graph, self.learning_manager, self.predictive_engine
-        )
+        # 学习进度事件产生的缺口更新由后台线程合并写入
+        self._write_queue: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=_WRITE_BEHIND_QUEUE_SIZE)
+        self._writer_thread = threading.Thread(target=self._write_behind_loop, daemon=True)
+        self._writer_thread.start()
+        self._closed = False
+        atexit.register(self.flush)
         
         # 存储
-        self.detected_gaps: Dict[str, List[KnowledgeGap]] = defaultdict(list)
+        self.detected_gaps: Dict[str, List[KnowledgeGap]] = {}
+        # 倒排索引: user_id -> concept -> 包含该概念的缺口
+        self._concept_to_gaps: Dict[str, Dict[str, List[KnowledgeGap]]] = {}
+        # 未解决缺口索引: user_id -> gap_id -> 缺口（保持检测顺序）
+        self._unresolved_gaps: Dict[str, Dict[str, KnowledgeGap]] = {}
+        # 大批量缺口的列式数值缓存: user_id -> GapArrays
+        self._gap_arrays: Dict[str, GapArrays] = {}
         self.remediation_plans: Dict[str, RemediationPlan] = {}
         
         self._init_database()
@@ -944,9 +1038,40 @@ class KnowledgeGapAnalysisEngine:
         
         logger.info("知识缺口分析引擎已初始化")
     
+    # 组件在首次使用时才初始化，只读取报告的进程无需构建这些子系统
+    @cached_property
+    def knowledge_graph(self):
+        return get_knowledge_graph_engine()
+    
+    @cached_property
+    def learning_manager(self):
+        return get_adaptive_learning_manager()
+    
+    @cached_property
+    def predictive_engine(self):
+        return get_predictive_intelligence_engine()
+    
+    @cached_property
+    def gap_detector(self) -> KnowledgeGapDetector:
+        return KnowledgeGapDetector(self.knowledge_graph, self.learning_manager)
+    
+    @cached_property
+    def plan_generator(self) -> RemediationPlanGenerator:
+        return RemediationPlanGenerator(
+            self.knowledge_graph, self.learning_manager, self.predictive_engine
+        )
+    
     def _init_database(self):
         """初始化数据库"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._lock:
+            conn = self._conn
+            # WAL模式下提交无需每次双重fsync
+            conn.executescript('''
+                PRAGMA journal_mode=WAL;
+                PRAGMA synchronous=NORMAL;
+                PRAGMA temp_store=MEMORY;
+            ''')
+            
             cursor = conn.cursor()
             
             # 知识缺口表
@@ -996,8 +1121,22 @@ class KnowledgeGapAnalysisEngine:
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_gaps_user ON knowledge_gaps(user_id)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_gaps_severity ON knowledge_gaps(severity)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_plans_user ON remediation_plans(user_id)')
-            
-            conn.commit()
+    
+    def flush(self):
+        """等待所有排队的缺口更新写入数据库"""
+        if self._writer_thread.is_alive():
+            self._write_queue.join()
+    
+    def close(self):
+        """写入剩余更新并关闭数据库连接"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._writer_thread.is_alive():
+            self._write_queue.put(None)
+            self._writer_thread.join()
+        with self._lock:
+            self._conn.close()
     
     def _register_event_handlers(self):
         """注册事件处理器"""
@@ -1020,14 +1159,23 @@ class KnowledgeGapAnalysisEngine:
             
             # 保存缺口
             self.detected_gaps[user_id] = gaps
+            self._index_gaps(user_id, gaps)
             self._save_gaps_to_db(gaps)
             
-            # 发送事件
+            # 发送事件（计数无需构造中间列表）
+            n_critical = 0
+            n_high_priority = 0
+            for gap in gaps:
+                if gap.severity is _GS_CRITICAL:
+                    n_critical += 1
+                if gap.remediation_priority >= 8:
+                    n_high_priority += 1
+            
             publish_event("knowledge_gaps.detected", {
                 'user_id': user_id,
                 'gap_count': len(gaps),
-                'critical_gaps': len([g for g in gaps if g.severity == GapSeverity.CRITICAL]),
-                'high_priority_gaps': len([g for g in gaps if g.remediation_priority >= 8])
+                'critical_gaps': n_critical,
+                'high_priority_gaps': n_high_priority
             }, "knowledge_gap_analyzer")
             
             return gaps
@@ -1040,14 +1188,13 @@ class KnowledgeGapAnalysisEngine:
         """生成补救计划"""
         try:
             # 获取要处理的缺口
-            user_gaps = self.detected_gaps.get(user_id, [])
-            
             if gap_ids:
                 # 只处理指定的缺口
+                user_gaps = self.detected_gaps.get(user_id, [])
                 target_gaps = [gap for gap in user_gaps if gap.gap_id in gap_ids]
             else:
                 # 处理所有未解决的缺口
-                target_gaps = [gap for gap in user_gaps if gap.resolution_status != 'resolved']
+                target_gaps = list(self._unresolved_gaps.get(user_id, {}).values())
             
             if not target_gaps:
                 logger.warning(f"用户 {user_id} 没有需要处理的缺口")
@@ -1088,164 +1235,292 @@ class KnowledgeGapAnalysisEngine:
                     'recommendations': ['暂无发现知识缺口']
                 }
             
-            # 按类型统计
-            gap_by_type = defaultdict(int)
-            gap_by_severity = defaultdict(int)
-            gap_by_priority = defaultdict(int)
-            
-            for gap in user_gaps:
-                gap_by_type[gap.gap_type.value] += 1
-                gap_by_severity[gap.severity.value] += 1
-                gap_by_priority[gap.remediation_priority] += 1
+            arrays = self._gap_arrays.get(user_id)
+            if arrays is not None and len(arrays.priorities) == len(user_gaps):
+                stats = self._aggregate_gap_arrays(user_gaps, arrays)
+            else:
+                stats = self._aggregate_gaps(user_gaps)
             
             # 生成总体建议
-            recommendations = self._generate_overall_recommendations(user_gaps)
-            
-            # 计算影响分析
-            total_impact = sum(gap.impact_score for gap in user_gaps)
-            avg_confidence = np.mean([gap.confidence for gap in user_gaps])
+            recommendations = self._build_overall_recommendations(
+                len(stats['critical_gaps']), stats['n_high'], stats['gap_types'], stats['total_time']
+            )
             
             return {
                 'user_id': user_id,
                 'total_gaps': len(user_gaps),
-                'gap_by_type': dict(gap_by_type),
-                'gap_by_severity': dict(gap_by_severity),
-                'priority_distribution': dict(gap_by_priority),
-                'total_impact_score': total_impact,
-                'average_confidence': avg_confidence,
-                'critical_gaps': [gap.to_dict() for gap in user_gaps if gap.severity == GapSeverity.CRITICAL],
-                'high_priority_gaps': [gap.to_dict() for gap in user_gaps if gap.remediation_priority >= 8],
+                'gap_by_type': stats['gap_by_type'],
+                'gap_by_severity': stats['gap_by_severity'],
+                'priority_distribution': stats['priority_distribution'],
+                'total_impact_score': stats['total_impact'],
+                'average_confidence': stats['confidence_sum'] / len(user_gaps),
+                'critical_gaps': stats['critical_gaps'],
+                'high_priority_gaps': stats['high_priority_gaps'],
                 'recommendations': recommendations,
-                'estimated_remediation_time': sum(gap.estimated_time_to_fix for gap in user_gaps)
+                'estimated_remediation_time': stats['total_time']
             }
             
         except Exception as e:
             logger.error(f"获取缺口分析报告失败: {e}")
             return {'error': str(e)}
     
-    def _generate_overall_recommendations(self, gaps: List[KnowledgeGap]) -> List[str]:
-        """生成总体建议"""
+    def _aggregate_gaps(self, user_gaps: List[KnowledgeGap]) -> Dict[str, Any]:
+        """单次遍历完成报告所需的全部统计"""
+        gap_by_type = defaultdict(int)
+        gap_by_severity = defaultdict(int)
+        gap_by_priority = defaultdict(int)
+        gap_types = set()
+        critical_gaps = []
+        high_priority_gaps = []
+        n_high = 0
+        total_impact = 0.0
+        confidence_sum = 0.0
+        total_time = 0.0
+        
+        # 热循环中绑定局部变量，避免重复的属性查找
+        gb_type = gap_by_type
+        gb_sev = gap_by_severity
+        gb_prio = gap_by_priority
+        add_type = gap_types.add
+        
+        for gap in user_gaps:
+            gap_type = gap.gap_type
+            severity = gap.severity
+            priority = gap.remediation_priority
+            
+            gb_type[gap_type.value] += 1
+            gb_sev[severity.value] += 1
+            gb_prio[priority] += 1
+            add_type(gap_type)
+            
+            if severity is _GS_CRITICAL:
+                critical_gaps.append(gap.to_dict())
+            elif severity is _GS_HIGH:
+                n_high += 1
+            if priority >= 8:
+                high_priority_gaps.append(gap.to_dict())
+            
+            total_impact += gap.impact_score
+            confidence_sum += gap.confidence
+            total_time += gap.estimated_time_to_fix
+        
+        return {
+            'gap_by_type': dict(gap_by_type),
+            'gap_by_severity': dict(gap_by_severity),
+            'priority_distribution': dict(gap_by_priority),
+            'gap_types': gap_types,
+            'critical_gaps': critical_gaps,
+            'high_priority_gaps': high_priority_gaps,
+            'n_high': n_high,
+            'total_impact': total_impact,
+            'confidence_sum': confidence_sum,
+            'total_time': total_time
+        }
+    
+    def _aggregate_gap_arrays(self, user_gaps: List[KnowledgeGap], arrays: GapArrays) -> Dict[str, Any]:
+        """基于列式数组的向量化统计，结果与 _aggregate_gaps 一致"""
+        type_counts = np.bincount(arrays.type_codes, minlength=len(_GAP_TYPES))
+        severity_counts = np.bincount(arrays.severity_codes, minlength=len(_GAP_SEVERITIES))
+        priorities, priority_counts = np.unique(arrays.priorities, return_counts=True)
+        
+        critical_idx = np.flatnonzero(arrays.severity_codes == _GAP_SEVERITY_CODES[_GS_CRITICAL])
+        high_priority_idx = np.flatnonzero(arrays.priorities >= 8)
+        
+        return {
+            'gap_by_type': {_GAP_TYPES[code].value: int(count)
+                            for code, count in enumerate(type_counts) if count},
+            'gap_by_severity': {_GAP_SEVERITIES[code].value: int(count)
+                                for code, count in enumerate(severity_counts) if count},
+            'priority_distribution': {int(p): int(c) for p, c in zip(priorities, priority_counts)},
+            'gap_types': {_GAP_TYPES[code] for code in np.flatnonzero(type_counts)},
+            'critical_gaps': [user_gaps[i].to_dict() for i in critical_idx],
+            'high_priority_gaps': [user_gaps[i].to_dict() for i in high_priority_idx],
+            'n_high': int(severity_counts[_GAP_SEVERITY_CODES[_GS_HIGH]]),
+            'total_impact': float(arrays.impact_scores.sum()),
+            'confidence_sum': float(arrays.confidences.sum()),
+            'total_time': float(arrays.times_to_fix.sum())
+        }
+    
+    def _build_overall_recommendations(self, n_critical: int, n_high: int,
+                                       gap_types: Set[GapType], total_time: float) -> List[str]:
+        """根据聚合统计生成总体建议"""
         recommendations = []
         
         # 按严重程度分析
-        critical_gaps = [g for g in gaps if g.severity == GapSeverity.CRITICAL]
-        high_gaps = [g for g in gaps if g.severity == GapSeverity.HIGH]
-        
-        if critical_gaps:
-            recommendations.append(f"立即处理{len(critical_gaps)}个严重缺口，这些缺口阻碍进一步学习")
+        if n_critical:
+            recommendations.append(f"立即处理{n_critical}个严重缺口，这些缺口阻碍进一步学习")
         
-        if high_gaps:
-            recommendations.append(f"优先关注{len(high_gaps)}个高优先级缺口")
+        if n_high:
+            recommendations.append(f"优先关注{n_high}个高优先级缺口")
         
         # 按类型分析
-        gap_types = set(gap.gap_type for gap in gaps)
-        
-        if GapType.PREREQUISITE_GAP in gap_types:
+        if _GT_PREREQ in gap_types:
             recommendations.append("建议先补强基础知识，再学习高级概念")
         
-        if GapType.VOCABULARY_GAP in gap_types:
+        if _GT_VOCAB in gap_types:
             recommendations.append("重点加强词汇积累，扩大词汇量")
         
-        if GapType.SEMANTIC_GAP in gap_types:
+        if _GT_SEMANTIC in gap_types:
             recommendations.append("注意建立概念间的语义联系")
         
         # 时间建议
-        total_time = sum(gap.estimated_time_to_fix for gap in gaps)
         if total_time > 0:
             days = math.ceil(total_time / 25.0)  # 假设每天25分钟
             recommendations.append(f"预计需要{days}天完成所有缺口补救")
         
         return recommendations
     
+    def _index_gaps(self, user_id: str, gaps: List[KnowledgeGap]):
+        """为用户缺口建立概念倒排索引、未解决缺口索引和列式数值缓存"""
+        self._unresolved_gaps[user_id] = {
+            gap.gap_id: gap for gap in gaps if gap.resolution_status != 'resolved'
+        }
+        
+        if len(gaps) >= _VECTORIZE_MIN_GAPS:
+            self._gap_arrays[user_id] = GapArrays.from_gaps(gaps)
+        else:
+            self._gap_arrays.pop(user_id, None)
+        
+        concept_index = defaultdict(list)
+        for gap in gaps:
+            for concept in gap.missing_concepts:
+                concept_index[concept].append(gap)
+            for concept in gap.weak_concepts - gap.missing_concepts:
+                concept_index[concept].append(gap)
+        self._concept_to_gaps[user_id] = dict(concept_index)
+    
     def _update_gap_resolution_status(self, user_id: str, progress_data: Dict[str, Any]):
         """更新缺口解决状态"""
         try:
             learned_concept = progress_data.get('concept')
             mastery_level = progress_data.get('mastery_level', 0.0)
             
-            if not learned_concept:
+            if not learned_concept or mastery_level <= 0.7:
                 return
             
-            # 更新相关缺口状态
-            user_gaps = self.detected_gaps.get(user_id, [])
-            for gap in user_gaps:
-                if learned_concept in gap.missing_concepts or learned_concept in gap.weak_concepts:
-                    if mastery_level > 0.7:
-                        # 移除已掌握的概念
-                        if learned_concept in gap.missing_concepts:
-                            gap.missing_concepts.remove(learned_concept)
-                        if learned_concept in gap.weak_concepts:
-                            gap.weak_concepts.remove(learned_concept)
-                        
-                        # 检查是否完全解决
-                        if not gap.missing_concepts and not gap.weak_concepts:
-                            gap.resolution_status = "resolved"
-                        
-                        gap.last_updated = time.time()
-                        
-                        # 更新数据库
-                        self._update_gap_in_db(gap)
+            # 通过倒排索引只访问包含该概念的缺口；掌握后概念会从这些缺口中全部移除
+            affected_gaps = self._concept_to_gaps.get(user_id, {}).pop(learned_concept, ())
+            for gap in affected_gaps:
+                remaining = len(gap.missing_concepts) + len(gap.weak_concepts)
+                
+                # 移除已掌握的概念
+                gap.missing_concepts.discard(learned_concept)
+                gap.weak_concepts.discard(learned_concept)
+                changed = len(gap.missing_concepts) + len(gap.weak_concepts) != remaining
+                
+                # 检查是否完全解决
+                if (not gap.missing_concepts and not gap.weak_concepts
+                        and gap.resolution_status != "resolved"):
+                    gap.resolution_status = "resolved"
+                    self._unresolved_gaps.get(user_id, {}).pop(gap.gap_id, None)
+                    changed = True
+                
+                # 没有实际变化时不更新时间戳，也不写数据库
+                if not changed:
+                    continue
+                
+                gap.last_updated = time.time()
+                
+                # 加入写后队列，由后台线程批量更新数据库
+                self._queue_gap_update(gap)
             
         except Exception as e:
             logger.error(f"更新缺口解决状态失败: {e}")
     
     def _save_gaps_to_db(self, gaps: List[KnowledgeGap]):
         """保存缺口到数据库"""
+        if not gaps:
+            return
+        
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                for gap in gaps:
-                    cursor.execute('''
-                        INSERT OR REPLACE INTO knowledge_gaps VALUES
-                        (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        gap.gap_id, gap.user_id, gap.gap_type.value, gap.severity.value,
-                        json.dumps(gap.missing_concepts), json.dumps(gap.weak_concepts),
-                        json.dumps(gap.prerequisite_concepts), json.dumps(gap.blocking_concepts),
-                        gap.impact_score, gap.confidence, gap.remediation_priority,
-                        json.dumps(gap.recommended_actions), gap.estimated_time_to_fix,
-                        gap.resolution_status, gap.detected_at, gap.last_updated
-                    ))
-                
-                conn.commit()
+            rows = [
+                (
+                    gap.gap_id, gap.user_id, gap.gap_type.value, gap.severity.value,
+                    _jdumps(sorted(gap.missing_concepts)), _jdumps(sorted(gap.weak_concepts)),
+                    _jdumps(gap.prerequisite_concepts), _jdumps(gap.blocking_concepts),
+                    gap.impact_score, gap.confidence, gap.remediation_priority,
+                    _jdumps(gap.recommended_actions), gap.estimated_time_to_fix,
+                    gap.resolution_status, gap.detected_at, gap.last_updated
+                )
+                for gap in gaps
+            ]
+            
+            with self._lock, self._conn as conn:
+                conn.execute('BEGIN')
+                conn.executemany(_SQL_INSERT_GAP, rows)
         except Exception as e:
             logger.error(f"保存缺口到数据库失败: {e}")
     
     def _save_plan_to_db(self, plan: RemediationPlan):
         """保存计划到数据库"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT OR REPLACE INTO remediation_plans VALUES
-                    (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    plan.plan_id, plan.user_id, json.dumps(plan.gaps_addressed),
-                    json.dumps(plan.learning_sequence), json.dumps(plan.milestone_concepts),
+            with self._lock:
+                self._conn.execute(_SQL_INSERT_PLAN, (
+                    plan.plan_id, plan.user_id, _jdumps(plan.gaps_addressed),
+                    _jdumps(plan.learning_sequence), _jdumps(plan.milestone_concepts),
                     plan.total_estimated_time, plan.daily_study_time, plan.estimated_completion_days,
-                    json.dumps(plan.study_methods), json.dumps(plan.practice_activities),
-                    json.dumps(plan.review_schedule), plan.completion_percentage,
-                    json.dumps(plan.completed_concepts), plan.created_at, plan.updated_at
+                    _jdumps(plan.study_methods), _jdumps(plan.practice_activities),
+                    _jdumps(plan.review_schedule), plan.completion_percentage,
+                    _jdumps(plan.completed_concepts), plan.created_at, plan.updated_at
                 ))
-                conn.commit()
         except Exception as e:
             logger.error(f"保存计划到数据库失败: {e}")
     
-    def _update_gap_in_db(self, gap: KnowledgeGap):
-        """更新数据库中的缺口"""
+    def _queue_gap_update(self, gap: KnowledgeGap):
+        """将缺口更新加入写后队列（队列已满时阻塞等待）"""
+        if self._closed:
+            logger.warning(f"缺口分析引擎已关闭，未写入缺口更新: {gap.gap_id}")
+            return
+        
+        row = (
+            _jdumps(sorted(gap.missing_concepts)), _jdumps(sorted(gap.weak_concepts)),
+            gap.resolution_status, gap.last_updated, gap.gap_id
+        )
+        if self._writer_thread.is_alive():
+            self._write_queue.put(row)
+        else:
+            # 后台线程已退出时直接同步写入，避免更新丢失
+            self._write_gap_updates([row])
+    
+    def _write_behind_loop(self):
+        """后台线程：合并排队的缺口更新并批量提交"""
+        stopping = False
+        while not stopping:
+            rows = []
+            item = self._write_queue.get()
+            
+            deadline = time.time() + _WRITE_BEHIND_INTERVAL
+            while True:
+                if item is None:
+                    stopping = True
+                else:
+                    rows.append(item)
+                
+                if stopping or len(rows) >= _WRITE_BEHIND_BATCH_SIZE:
+                    break
+                timeout = deadline - time.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._write_queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+            
+            self._write_gap_updates(rows)
+            
+            # 每个取出的元素（包括结束标记）都要标记完成
+            for _ in range(len(rows) + (1 if stopping else 0)):
+                self._write_queue.task_done()
+    
+    def _write_gap_updates(self, rows: List[tuple]):
+        """批量更新数据库中的缺口"""
+        if not rows:
+            return
+        
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    UPDATE knowledge_gaps SET 
-                    missing_concepts = ?, weak_concepts = ?, resolution_status = ?, last_updated = ?
-                    WHERE gap_id = ?
-                ''', (
-                    json.dumps(gap.missing_concepts), json.dumps(gap.weak_concepts),
-                    gap.resolution_status, gap.last_updated, gap.gap_id
-                ))
-                conn.commit()
+            with self._lock, self._conn as conn:
+                conn.execute('BEGIN')
+                conn.executemany(_SQL_UPDATE_GAP, rows)
         except Exception as e:
             logger.error(f"更新缺口数据失败: {e}")
 
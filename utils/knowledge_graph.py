@@ -3,14 +3,24 @@ Knowledge Graph Semantic Engine
 知识图谱语义引擎 - 使用图数据库构建词汇间的语义关系网络
 """
 
+import asyncio
+import atexit
+import heapq
 import json
+import queue
+import re
 import logging
 import time
+import uuid
 import sqlite3
+import threading
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Tuple, Any, Union, Set
-from collections import defaultdict, deque
+from collections import Counter, OrderedDict, defaultdict
+from contextlib import contextmanager
+from functools import lru_cache, partial
+from operator import attrgetter
 from pathlib import Path
 import numpy as np
 import math
@@ -22,13 +32,34 @@ except ImportError:
     NEO4J_AVAILABLE = False
     logging.getLogger(__name__).warning("Neo4j driver not available, using fallback graph implementation")
 
+try:
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
 from .event_system import publish_event, register_event_handler, VocabMasterEventTypes, Event
 from .ai_model_manager import get_ai_model_manager, AIRequest, ModelCapability
 
 logger = logging.getLogger(__name__)
 
+# metadata/evidence列的紧凑JSON编码；空容器在读取时直接跳过解码
+_jdumps = partial(json.dumps, separators=(',', ':'), ensure_ascii=False)
+_EMPTY_JSON = frozenset(('[]', '{}'))
+
+# 词性检测标记（子串匹配，按顺序判定），每类预编译为一个交替正则
+_CONCEPT_TYPE_PATTERNS = tuple(
+    (concept_type, re.compile('|'.join(map(re.escape, markers)), re.IGNORECASE))
+    for concept_type, markers in (
+        ('verb', ('verb', 'action', 'to do', 'process')),
+        ('adjective', ('adjective', 'quality', 'characteristic')),
+        ('adverb', ('adverb', 'manner', 'way')),
+    )
+)
 
-@dataclass
+
+@dataclass(slots=True, frozen=True)
 class SemanticRelation:
     """语义关系"""
     source_word: str
@@ -40,20 +71,19 @@ class SemanticRelation:
     confidence: float = 0.5  # 置信度
     created_at: float = field(default_factory=time.time)
     
+    _FIELDS = ('source_word', 'target_word', 'relation_type', 'strength',
+               'context', 'evidence', 'confidence', 'created_at')
+    _GETTER = attrgetter(*_FIELDS)
+    
+    def as_row(self) -> tuple:
+        """按_FIELDS顺序返回字段值元组"""
+        return self._GETTER(self)
+    
     def to_dict(self) -> Dict[str, Any]:
-        return {
-            'source_word': self.source_word,
-            'target_word': self.target_word,
-            'relation_type': self.relation_type,
-            'strength': self.strength,
-            'context': self.context,
-            'evidence': self.evidence,
-            'confidence': self.confidence,
-            'created_at': self.created_at
-        }
-
-
-@dataclass
+        return dict(zip(self._FIELDS, self._GETTER(self)))
+
+
+@dataclass(slots=True, frozen=True)
 class ConceptNode:
     """概念节点"""
     word: str
@@ -66,21 +96,19 @@ class ConceptNode:
     cluster_id: Optional[str] = None  # 聚类ID
     metadata: Dict[str, Any] = field(default_factory=dict)
     
+    _FIELDS = ('word', 'concept_type', 'definition', 'frequency', 'difficulty',
+               'semantic_density', 'centrality_score', 'cluster_id', 'metadata')
+    _GETTER = attrgetter(*_FIELDS)
+    
+    def as_row(self) -> tuple:
+        """按_FIELDS顺序返回字段值元组"""
+        return self._GETTER(self)
+    
     def to_dict(self) -> Dict[str, Any]:
-        return {
-            'word': self.word,
-            'concept_type': self.concept_type,
-            'definition': self.definition,
-            'frequency': self.frequency,
-            'difficulty': self.difficulty,
-            'semantic_density': self.semantic_density,
-            'centrality_score': self.centrality_score,
-            'cluster_id': self.cluster_id,
-            'metadata': self.metadata
-        }
-
-
-@dataclass
+        return dict(zip(self._FIELDS, self._GETTER(self)))
+
+
+@dataclass(slots=True)
 class SemanticCluster:
     """语义聚类"""
     cluster_id: str
@@ -93,9 +121,215 @@ class SemanticCluster:
     created_at: float = field(default_factory=time.time)
 
 
+def _union_find_clusters(edges) -> Dict[str, str]:
+    """并查集连通分量聚类，按词首次出现顺序分配聚类ID
+    
+    find 采用迭代式路径压缩，union 按秩合并，避免深链导致的递归溢出。
+    """
+    parent: Dict[str, str] = {}
+    rank: Dict[str, int] = {}
+    
+    def find(x):
+        if x not in parent:
+            parent[x] = x
+            rank[x] = 0
+            return x
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        while parent[x] != root:
+            parent[x], x = root, parent[x]
+        return root
+    
+    def union(x, y):
+        px, py = find(x), find(y)
+        if px == py:
+            return
+        if rank[px] < rank[py]:
+            px, py = py, px
+        parent[py] = px
+        if rank[px] == rank[py]:
+            rank[px] += 1
+    
+    # 建立连接
+    for word1, word2 in edges:
+        union(word1, word2)
+    
+    # 分配聚类ID
+    clusters = {}
+    cluster_map = {}
+    
+    for word in parent:
+        root = find(word)
+        if root not in cluster_map:
+            cluster_map[root] = f"cluster_{len(cluster_map)}"
+        clusters[word] = cluster_map[root]
+    
+    return clusters
+
+
+def _louvain_local_moving(adjacency: List[Dict[int, float]], total_weight: float,
+                          resolution: float) -> Tuple[List[int], bool]:
+    """Louvain第一阶段：逐个节点移动到模块度增益最大的相邻社区
+    
+    使用增量ΔQ（k_i,in - γ·Σtot·k_i / 2m），不重新计算整体模块度。
+    返回重新编号后的社区划分以及是否发生过移动。
+    """
+    degrees = [sum(row.values()) for row in adjacency]
+    community = list(range(len(adjacency)))
+    community_total = degrees[:]
+    moved_any = False
+    moved = True
+    
+    while moved:
+        moved = False
+        for node, row in enumerate(adjacency):
+            current = community[node]
+            degree = degrees[node]
+            
+            links = defaultdict(float)
+            for neighbor, weight in row.items():
+                if neighbor != node:
+                    links[community[neighbor]] += weight
+            
+            community_total[current] -= degree
+            best = current
+            best_gain = links.get(current, 0.0) - resolution * community_total[current] * degree / total_weight
+            for candidate, weight in links.items():
+                gain = weight - resolution * community_total[candidate] * degree / total_weight
+                if gain > best_gain + 1e-12:
+                    best, best_gain = candidate, gain
+            community_total[best] += degree
+            
+            if best != current:
+                community[node] = best
+                moved = moved_any = True
+    
+    renumber = {}
+    community = [renumber.setdefault(c, len(renumber)) for c in community]
+    return community, moved_any
+
+
+def _louvain_partition(edges: List[Tuple[str, str, float]], total_weight: float,
+                       resolution: float = 1.0) -> Dict[str, int]:
+    """对一组加权边运行Louvain（局部移动 + 社区收缩，直到不再改进）"""
+    index: Dict[str, int] = {}
+    adjacency: List[Dict[int, float]] = []
+    
+    def node_index(word: str) -> int:
+        i = index.get(word)
+        if i is None:
+            i = index[word] = len(adjacency)
+            adjacency.append(defaultdict(float))
+        return i
+    
+    for word1, word2, weight in edges:
+        i, j = node_index(word1), node_index(word2)
+        if i == j:
+            adjacency[i][i] += 2 * weight
+        else:
+            adjacency[i][j] += weight
+            adjacency[j][i] += weight
+    
+    membership = list(range(len(adjacency)))
+    while len(adjacency) > 1:
+        community, moved = _louvain_local_moving(adjacency, total_weight, resolution)
+        if not moved:
+            break
+        membership = [community[c] for c in membership]
+        
+        # 第二阶段：把社区收缩为超节点，社区内部边变为自环
+        aggregated = [defaultdict(float) for _ in range(max(community) + 1)]
+        for i, row in enumerate(adjacency):
+            target_row = aggregated[community[i]]
+            for j, weight in row.items():
+                target_row[community[j]] += weight
+        adjacency = aggregated
+    
+    return {word: membership[i] for word, i in index.items()}
+
+
+def _connected_component_clusters(edges) -> Dict[str, str]:
+    """连通分量聚类，按词首次出现顺序分配聚类ID
+    
+    scipy可用时在稀疏邻接矩阵上求连通分量，否则退回并查集。
+    """
+    if not SCIPY_AVAILABLE:
+        return _union_find_clusters(edges)
+    
+    word_to_idx: Dict[str, int] = {}
+    rows = []
+    cols = []
+    for word1, word2 in edges:
+        rows.append(word_to_idx.setdefault(word1, len(word_to_idx)))
+        cols.append(word_to_idx.setdefault(word2, len(word_to_idx)))
+    if not word_to_idx:
+        return {}
+    
+    size = len(word_to_idx)
+    adjacency = coo_matrix(
+        (np.ones(len(rows), dtype=np.int8), (np.asarray(rows), np.asarray(cols))),
+        shape=(size, size)
+    ).tocsr()
+    _, labels = connected_components(adjacency, directed=False)
+    
+    cluster_map = {}
+    return {
+        word: cluster_map.setdefault(label, f"cluster_{len(cluster_map)}")
+        for word, label in zip(word_to_idx, labels.tolist())
+    }
+
+
+def _louvain_communities(edges, resolution: float = 1.0) -> Dict[str, str]:
+    """Louvain模块度优化社区检测，按词首次出现顺序分配聚类ID
+    
+    先按连通分量拆分，再在每个分量内优化模块度（ΔQ仍按全图总权重计算，
+    结果与在整图上运行一致）；至多两个节点的分量直接作为一个社区。
+    """
+    edges = list(edges)
+    components = _connected_component_clusters((word1, word2) for word1, word2, _ in edges)
+    total_weight = 2.0 * sum(weight for _, _, weight in edges)
+    if total_weight <= 0:
+        return components
+    
+    component_edges = defaultdict(list)
+    component_sizes = defaultdict(int)
+    for word, component_id in components.items():
+        component_sizes[component_id] += 1
+    for edge in edges:
+        component_edges[components[edge[0]]].append(edge)
+    
+    labels = {}
+    for component_id, group in component_edges.items():
+        if component_sizes[component_id] <= 2:
+            for word1, word2, _ in group:
+                labels[word1] = labels[word2] = (component_id, 0)
+            continue
+        for word, local_id in _louvain_partition(group, total_weight, resolution).items():
+            labels[word] = (component_id, local_id)
+    
+    cluster_map = {}
+    return {
+        word: cluster_map.setdefault(labels[word], f"cluster_{len(cluster_map)}")
+        for word in components
+    }
+
+
+def _normalize_degrees(words: List[str], degrees) -> Dict[str, float]:
+    """度数按最大度数归一化为中心性（向量化）"""
+    if not words:
+        return {}
+    values = np.fromiter(degrees, dtype=np.float64, count=len(words))
+    values /= max(values.max(), 1.0)
+    return dict(zip(words, values.tolist()))
+
+
 class GraphBackend(ABC):
     """图数据库后端抽象接口"""
     
+    # 写入计数，每次成功写入后递增，供上层缓存判断是否过期
+    write_version = 0
+    
     @abstractmethod
     def add_node(self, node: ConceptNode) -> bool:
         """添加节点"""
@@ -106,6 +340,34 @@ class GraphBackend(ABC):
         """添加关系"""
         pass
     
+    def add_nodes_batch(self, nodes: List[ConceptNode]) -> int:
+        """批量添加节点，返回成功添加的数量（后端可覆盖以减少往返）"""
+        added = sum(1 for node in nodes if self.add_node(node))
+        if added:
+            self.write_version += 1
+        return added
+    
+    def add_relations_batch(self, relations: List[SemanticRelation]) -> int:
+        """批量添加关系，返回成功添加的数量（后端可覆盖以减少往返）"""
+        added = sum(1 for relation in relations if self.add_relation(relation))
+        if added:
+            self.write_version += 1
+        return added
+    
+    def ensure_nodes(self, words: Set[str]) -> int:
+        """为尚不存在的词创建占位节点，返回新建的数量（后端可覆盖以减少往返）"""
+        missing = [word for word in words if self.get_node(word) is None]
+        return self.add_nodes_batch([ConceptNode(word=word, concept_type='concept', definition='') for word in missing])
+    
+    def invalidate_cache(self, words: Optional[List[str]] = None):
+        """使读缓存失效（words为None时清空全部），无缓存的后端无需处理"""
+        pass
+    
+    @abstractmethod
+    def get_counts(self) -> Tuple[int, int, Dict[str, int]]:
+        """获取节点数、关系数及关系类型分布"""
+        pass
+    
     @abstractmethod
     def get_node(self, word: str) -> Optional[ConceptNode]:
         """获取节点"""
@@ -126,6 +388,15 @@ class GraphBackend(ABC):
         """获取邻居节点"""
         pass
     
+    def get_edges_within(self, words: Set[str]) -> List[Tuple[str, str]]:
+        """获取两端都在给定词集合内的关系 (源词, 目标词)（后端可覆盖以减少往返）"""
+        return [
+            (word, relation.target_word)
+            for word in words
+            for relation in self.get_relations(word)
+            if relation.target_word in words
+        ]
+    
     @abstractmethod
     def compute_centrality(self) -> Dict[str, float]:
         """计算中心性"""
@@ -137,6 +408,58 @@ class GraphBackend(ABC):
         pass
 
 
+# 变长路径查询的最大跳数
+MAX_CYPHER_PATH_DEPTH = 10
+
+# 批量写入的Cypher语句保持字符串不变，便于服务端复用执行计划
+_CYPHER_MERGE_NODES = """
+UNWIND $rows AS row
+MERGE (w:Word {word: row.word})
+SET w.concept_type = row.concept_type,
+    w.definition = row.definition,
+    w.frequency = row.frequency,
+    w.difficulty = row.difficulty,
+    w.semantic_density = row.semantic_density,
+    w.centrality_score = row.centrality_score,
+    w.cluster_id = row.cluster_id,
+    w.metadata = row.metadata,
+    w.updated_at = timestamp()
+"""
+
+_CYPHER_MERGE_RELATIONS = """
+UNWIND $rows AS row
+MATCH (source:Word {word: row.source_word})
+MATCH (target:Word {word: row.target_word})
+MERGE (source)-[r:RELATES_TO {type: row.relation_type}]->(target)
+SET r.strength = row.strength,
+    r.context = row.context,
+    r.evidence = row.evidence,
+    r.confidence = row.confidence,
+    r.created_at = row.created_at
+"""
+
+
+_CYPHER_ENSURE_NODES = """
+UNWIND $words AS word
+MERGE (w:Word {word: word})
+ON CREATE SET w.concept_type = 'concept',
+              w.definition = '',
+              w.updated_at = timestamp()
+"""
+
+
+def _ensure_nodes_tx(tx, words: List[str]) -> int:
+    return tx.run(_CYPHER_ENSURE_NODES, words=words).consume().counters.nodes_created
+
+
+def _merge_nodes_tx(tx, rows: List[Dict[str, Any]]):
+    tx.run(_CYPHER_MERGE_NODES, rows=rows).consume()
+
+
+def _merge_relations_tx(tx, rows: List[Dict[str, Any]]):
+    tx.run(_CYPHER_MERGE_RELATIONS, rows=rows).consume()
+
+
 class Neo4jBackend(GraphBackend):
     """Neo4j图数据库后端"""
     
@@ -145,8 +468,25 @@ class Neo4jBackend(GraphBackend):
             raise ImportError("Neo4j driver not available")
         
         self.driver = GraphDatabase.driver(uri, auth=(user, password))
+        
+        # 会话非线程安全，每个线程持有一个长期会话
+        self._local = threading.local()
+        self._sessions = []
+        self._sessions_lock = threading.Lock()
+        
         self._create_constraints()
     
+    @contextmanager
+    def _thread_session(self):
+        """获取当前线程的长期会话（首次使用时创建）"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self.driver.session()
+            self._local.session = session
+            with self._sessions_lock:
+                self._sessions.append(session)
+        yield session
+    
     def _create_constraints(self):
         """创建约束和索引"""
         with self.driver.session() as session:
@@ -159,51 +499,58 @@ class Neo4jBackend(GraphBackend):
     
     def add_node(self, node: ConceptNode) -> bool:
         """添加节点"""
+        return self.add_nodes_batch([node]) == 1
+    
+    def add_relation(self, relation: SemanticRelation) -> bool:
+        """添加关系"""
+        return self.add_relations_batch([relation]) == 1
+    
+    def add_nodes_batch(self, nodes: List[ConceptNode]) -> int:
+        """批量添加节点（UNWIND单次往返）"""
+        if not nodes:
+            return 0
         try:
-            with self.driver.session() as session:
-                query = """
-                MERGE (w:Word {word: $word})
-                SET w.concept_type = $concept_type,
-                    w.definition = $definition,
-                    w.frequency = $frequency,
-                    w.difficulty = $difficulty,
-                    w.semantic_density = $semantic_density,
-                    w.centrality_score = $centrality_score,
-                    w.cluster_id = $cluster_id,
-                    w.metadata = $metadata,
-                    w.updated_at = timestamp()
-                """
-                session.run(query, **node.to_dict())
-                return True
+            rows = [node.to_dict() for node in nodes]
+            with self._thread_session() as session:
+                session.execute_write(_merge_nodes_tx, rows)
+            self.write_version += 1
+            return len(rows)
         except Exception as e:
             logger.error(f"添加节点失败: {e}")
-            return False
+            return 0
     
-    def add_relation(self, relation: SemanticRelation) -> bool:
-        """添加关系"""
+    def add_relations_batch(self, relations: List[SemanticRelation]) -> int:
+        """批量添加关系（UNWIND单次往返）"""
+        if not relations:
+            return 0
         try:
-            with self.driver.session() as session:
-                query = """
-                MATCH (source:Word {word: $source_word})
-                MATCH (target:Word {word: $target_word})
-                MERGE (source)-[r:RELATES_TO]->(target)
-                SET r.type = $relation_type,
-                    r.strength = $strength,
-                    r.context = $context,
-                    r.evidence = $evidence,
-                    r.confidence = $confidence,
-                    r.created_at = $created_at
-                """
-                session.run(query, **relation.to_dict())
-                return True
+            rows = [relation.to_dict() for relation in relations]
+            with self._thread_session() as session:
+                session.execute_write(_merge_relations_tx, rows)
+            self.write_version += 1
+            return len(rows)
         except Exception as e:
             logger.error(f"添加关系失败: {e}")
-            return False
+            return 0
+    
+    def ensure_nodes(self, words: Set[str]) -> int:
+        """为尚不存在的词创建占位节点（MERGE单次往返）"""
+        if not words:
+            return 0
+        try:
+            with self._thread_session() as session:
+                created = session.execute_write(_ensure_nodes_tx, list(words))
+            if created:
+                self.write_version += 1
+            return created
+        except Exception as e:
+            logger.error(f"创建占位节点失败: {e}")
+            return 0
     
     def get_node(self, word: str) -> Optional[ConceptNode]:
         """获取节点"""
         try:
-            with self.driver.session() as session:
+            with self._thread_session() as session:
                 query = "MATCH (w:Word {word: $word}) RETURN w"
                 result = session.run(query, word=word)
                 record = result.single()
@@ -228,7 +575,7 @@ class Neo4jBackend(GraphBackend):
     def get_relations(self, word: str, relation_types: Optional[List[str]] = None) -> List[SemanticRelation]:
         """获取关系"""
         try:
-            with self.driver.session() as session:
+            with self._thread_session() as session:
                 if relation_types:
                     query = """
                     MATCH (source:Word {word: $word})-[r:RELATES_TO]->(target:Word)
@@ -265,13 +612,18 @@ class Neo4jBackend(GraphBackend):
     
     def find_path(self, source: str, target: str, max_depth: int = 3) -> Optional[List[str]]:
         """查找路径"""
+        if max_depth < 1:
+            return None
+        
+        # Cypher不接受参数化的变长路径上界，校验后以字面量内联
+        max_depth = min(int(max_depth), MAX_CYPHER_PATH_DEPTH)
         try:
-            with self.driver.session() as session:
-                query = """
-                MATCH path = shortestPath((source:Word {word: $source})-[:RELATES_TO*1..$max_depth]->(target:Word {word: $target}))
+            with self._thread_session() as session:
+                query = f"""
+                MATCH path = shortestPath((source:Word {{word: $source}})-[:RELATES_TO*1..{max_depth}]->(target:Word {{word: $target}}))
                 RETURN [node in nodes(path) | node.word] as path
                 """
-                result = session.run(query, source=source, target=target, max_depth=max_depth)
+                result = session.run(query, source=source, target=target)
                 record = result.single()
                 
                 if record:
@@ -282,79 +634,104 @@ class Neo4jBackend(GraphBackend):
     
     def get_neighbors(self, word: str, depth: int = 1, relation_types: Optional[List[str]] = None) -> List[str]:
         """获取邻居节点"""
+        if depth < 1:
+            return []
+        
+        depth = min(int(depth), MAX_CYPHER_PATH_DEPTH)
         try:
-            with self.driver.session() as session:
-                if relation_types:
-                    query = f"""
-                    MATCH (source:Word {{word: $word}})-[:RELATES_TO*1..{depth}]->(neighbor:Word)
-                    WHERE ALL(r in relationships(path) WHERE r.type IN $relation_types)
-                    RETURN DISTINCT neighbor.word as neighbor
-                    """
-                    result = session.run(query, word=word, relation_types=relation_types)
-                else:
-                    query = f"""
-                    MATCH (source:Word {{word: $word}})-[:RELATES_TO*1..{depth}]->(neighbor:Word)
-                    RETURN DISTINCT neighbor.word as neighbor
-                    """
-                    result = session.run(query, word=word)
+            with self._thread_session() as session:
+                # 关系列表绑定到rels，按类型过滤时逐条检查
+                where = "WHERE ALL(r IN rels WHERE r.type IN $relation_types)" if relation_types else ""
+                query = f"""
+                MATCH (source:Word {{word: $word}})-[rels:RELATES_TO*1..{depth}]->(neighbor:Word)
+                {where}
+                RETURN DISTINCT neighbor.word as neighbor
+                """
+                result = session.run(query, word=word, relation_types=relation_types or [])
                 
                 return [record['neighbor'] for record in result]
         except Exception as e:
             logger.error(f"获取邻居节点失败: {e}")
             return []
     
+    def get_counts(self) -> Tuple[int, int, Dict[str, int]]:
+        """获取节点数、关系数及关系类型分布"""
+        with self._thread_session() as session:
+            node_count = session.run("MATCH (w:Word) RETURN count(w) as count").single()['count']
+            result = session.run("MATCH ()-[r:RELATES_TO]->() RETURN r.type as type, count(r) as count")
+            relation_types = {record['type']: record['count'] for record in result}
+        return node_count, sum(relation_types.values()), relation_types
+    
+    def get_edges_within(self, words: Set[str]) -> List[Tuple[str, str]]:
+        """获取两端都在给定词集合内的关系，一次查询完成"""
+        try:
+            with self._thread_session() as session:
+                query = """
+                MATCH (a:Word)-[:RELATES_TO]->(b:Word)
+                WHERE a.word IN $words AND b.word IN $words
+                RETURN a.word as source, b.word as target
+                """
+                result = session.run(query, words=list(words))
+                
+                return [(record['source'], record['target']) for record in result]
+        except Exception as e:
+            logger.error(f"获取聚类内关系失败: {e}")
+            return []
+    
     def compute_centrality(self) -> Dict[str, float]:
         """计算中心性"""
         try:
-            with self.driver.session() as session:
-                # 使用度中心性
+            with self._thread_session() as session:
+                # 使用度中心性，归一化在服务端完成，客户端逐条流式消费
                 query = """
                 MATCH (w:Word)
                 OPTIONAL MATCH (w)-[:RELATES_TO]-(connected)
                 WITH w, count(connected) as degree
-                RETURN w.word as word, degree
+                WITH collect({word: w.word, degree: degree}) as rows, toFloat(max(degree)) as max_degree
+                WITH rows, CASE WHEN max_degree < 1.0 THEN 1.0 ELSE max_degree END as max_degree
+                UNWIND rows as row
+                RETURN row.word as word, toFloat(row.degree) / max_degree as centrality
                 """
                 result = session.run(query)
                 
-                centrality = {}
-                max_degree = 1
-                
-                # 第一遍：获取最大度数
-                degrees = {}
-                for record in result:
-                    word = record['word']
-                    degree = record['degree']
-                    degrees[word] = degree
-                    max_degree = max(max_degree, degree)
-                
-                # 标准化中心性分数
-                for word, degree in degrees.items():
-                    centrality[word] = degree / max_degree
-                
-                return centrality
+                return {record['word']: record['centrality'] for record in result}
         except Exception as e:
             logger.error(f"计算中心性失败: {e}")
             return {}
     
     def detect_communities(self) -> Dict[str, str]:
         """检测社区/聚类"""
+        graph_name = f"vocab_strong_{uuid.uuid4().hex}"
         try:
-            with self.driver.session() as session:
-                # 使用连通组件检测（简化的社区检测）
-                query = """
-                CALL gds.wcc.stream('myGraph')
-                YIELD nodeId, componentId
-                RETURN gds.util.asNode(nodeId).word as word, componentId
+            with self._thread_session() as session:
+                # 在服务端按强关系投影临时图，社区检测在GDS中完成，无需回传边
+                project_query = """
+                CALL gds.graph.project.cypher(
+                    $graph_name,
+                    'MATCH (w:Word)-[r:RELATES_TO]-() WHERE r.strength > 0.7 RETURN DISTINCT id(w) AS id',
+                    'MATCH (a:Word)-[r:RELATES_TO]->(b:Word) WHERE r.strength > 0.7
+                     RETURN id(a) AS source, id(b) AS target, r.strength AS strength'
+                ) YIELD graphName
+                RETURN graphName
                 """
-                result = session.run(query)
+                session.run(project_query, graph_name=graph_name).consume()
                 
-                communities = {}
-                for record in result:
-                    word = record['word']
-                    community_id = f"cluster_{record['componentId']}"
-                    communities[word] = community_id
-                
-                return communities
+                try:
+                    query = """
+                    CALL gds.louvain.stream($graph_name, {relationshipWeightProperty: 'strength'})
+                    YIELD nodeId, communityId
+                    RETURN gds.util.asNode(nodeId).word as word, communityId
+                    """
+                    result = session.run(query, graph_name=graph_name)
+                    
+                    # 与SQLite后端一致，按首次出现顺序分配聚类ID
+                    cluster_map = {}
+                    return {
+                        record['word']: cluster_map.setdefault(record['communityId'], f"cluster_{len(cluster_map)}")
+                        for record in result
+                    }
+                finally:
+                    session.run("CALL gds.graph.drop($graph_name, false)", graph_name=graph_name).consume()
         except Exception as e:
             logger.warning(f"社区检测失败，使用简化方法: {e}")
             # 简化的聚类方法
@@ -364,303 +741,552 @@ class Neo4jBackend(GraphBackend):
         """简化的聚类方法"""
         # 基于关系强度的简单聚类
         try:
-            with self.driver.session() as session:
+            with self._thread_session() as session:
                 query = """
                 MATCH (w1:Word)-[r:RELATES_TO]->(w2:Word)
                 WHERE r.strength > 0.7
                 RETURN w1.word as word1, w2.word as word2, r.strength as strength
-                ORDER BY r.strength DESC
                 """
                 result = session.run(query)
                 
-                # 使用并查集进行聚类
-                parent = {}
-                
-                def find(x):
-                    if x not in parent:
-                        parent[x] = x
-                    if parent[x] != x:
-                        parent[x] = find(parent[x])
-                    return parent[x]
-                
-                def union(x, y):
-                    px, py = find(x), find(y)
-                    if px != py:
-                        parent[px] = py
-                
-                # 建立连接
-                for record in result:
-                    union(record['word1'], record['word2'])
-                
-                # 分配聚类ID
-                clusters = {}
-                cluster_counter = 0
-                cluster_map = {}
-                
-                for word in parent:
-                    root = find(word)
-                    if root not in cluster_map:
-                        cluster_map[root] = f"cluster_{cluster_counter}"
-                        cluster_counter += 1
-                    clusters[word] = cluster_map[root]
-                
-                return clusters
+                # Louvain模块度优化
+                return _louvain_communities(
+                    (record['word1'], record['word2'], record['strength']) for record in result
+                )
         except Exception as e:
             logger.error(f"简化聚类失败: {e}")
             return {}
     
     def close(self):
         """关闭连接"""
+        with self._sessions_lock:
+            for session in self._sessions:
+                session.close()
+            self._sessions.clear()
         self.driver.close()
 
 
+# SQLite后端将[0,1]区间的分数量化为0-255整数存储（SQLite整数变长编码，1-2字节）
+_QUANT_SCALE = 255
+
+
+def _quantize(value: Optional[float]) -> Optional[int]:
+    """[0,1]分数量化为0-255整数"""
+    if value is None:
+        return None
+    return int(round(max(0.0, min(1.0, value)) * _QUANT_SCALE))
+
+
+def _dequantize(value: Optional[float]) -> Optional[float]:
+    """0-255整数还原为[0,1]分数"""
+    if value is None:
+        return None
+    return value / _QUANT_SCALE
+
+
+# 强关系阈值（strength > 0.7）的量化形式
+_STRONG_STRENGTH_Q = _quantize(0.7)
+
+# 量化存储的模式版本（PRAGMA user_version），低于此版本的库需迁移浮点列
+_SQLITE_SCHEMA_VERSION = 1
+
+# SQLite后端的连接参数与表结构，建库时一次性执行
+# page_size/auto_vacuum须在建表前设置才对新库生效；WAL允许读写并发，
+# NORMAL同步级别在WAL下仍保证一致性；mmap将至多256MiB数据库映射进内存
+_SQLITE_SCHEMA = '''
+PRAGMA page_size=8192;
+PRAGMA auto_vacuum=INCREMENTAL;
+PRAGMA journal_mode=WAL;
+PRAGMA synchronous=NORMAL;
+PRAGMA temp_store=MEMORY;
+PRAGMA cache_size=-65536;
+PRAGMA mmap_size=268435456;
+
+-- 节点表
+CREATE TABLE IF NOT EXISTS concept_nodes (
+    word TEXT PRIMARY KEY,
+    concept_type TEXT,
+    definition TEXT,
+    frequency INTEGER DEFAULT 0,
+    difficulty INTEGER DEFAULT 128,
+    semantic_density INTEGER DEFAULT 0,
+    centrality_score INTEGER DEFAULT 0,
+    cluster_id TEXT,
+    metadata TEXT,
+    updated_at REAL
+);
+
+-- 关系表
+CREATE TABLE IF NOT EXISTS semantic_relations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    source_word TEXT,
+    target_word TEXT,
+    relation_type TEXT,
+    strength INTEGER,
+    context TEXT,
+    evidence TEXT,
+    confidence INTEGER,
+    created_at REAL,
+    FOREIGN KEY (source_word) REFERENCES concept_nodes (word),
+    FOREIGN KEY (target_word) REFERENCES concept_nodes (word)
+);
+
+-- 索引；(source_word, relation_type)复合索引的最左前缀覆盖按source_word的查找
+CREATE INDEX IF NOT EXISTS idx_nodes_word ON concept_nodes(word);
+DROP INDEX IF EXISTS idx_relations_source;
+CREATE INDEX IF NOT EXISTS idx_relations_source_type ON semantic_relations(source_word, relation_type);
+CREATE INDEX IF NOT EXISTS idx_relations_target ON semantic_relations(target_word);
+CREATE INDEX IF NOT EXISTS idx_relations_type ON semantic_relations(relation_type);
+CREATE INDEX IF NOT EXISTS idx_relations_strength ON semantic_relations(strength);
+'''
+
+# 将旧版浮点分数列就地量化
+_SQLITE_QUANTIZE_MIGRATION = f'''
+UPDATE concept_nodes SET
+    difficulty = CAST(round(max(0.0, min(1.0, difficulty)) * {_QUANT_SCALE}) AS INTEGER),
+    semantic_density = CAST(round(max(0.0, min(1.0, semantic_density)) * {_QUANT_SCALE}) AS INTEGER),
+    centrality_score = CAST(round(max(0.0, min(1.0, centrality_score)) * {_QUANT_SCALE}) AS INTEGER);
+UPDATE semantic_relations SET
+    strength = CAST(round(max(0.0, min(1.0, strength)) * {_QUANT_SCALE}) AS INTEGER),
+    confidence = CAST(round(max(0.0, min(1.0, confidence)) * {_QUANT_SCALE}) AS INTEGER);
+'''
+
 class SQLiteGraphBackend(GraphBackend):
     """SQLite图数据库后端（后备方案）"""
     
     def __init__(self, db_path: str = "data/knowledge_graph.db"):
         self.db_path = db_path
+        
+        # 后端生命周期内复用同一连接；RLock允许同一线程内的嵌套调用
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.RLock()
+        
+        # LRU读缓存: word -> 节点；word -> {关系类型键: 关系列表}
+        self._node_cache: "OrderedDict[str, Optional[ConceptNode]]" = OrderedDict()
+        self._relation_cache: "OrderedDict[str, Dict[Tuple[str, ...], List[SemanticRelation]]]" = OrderedDict()
+        
         self._init_database()
+        
+        # 节点数、关系数及关系类型分布：启动时统计一次，之后随写入增量维护
+        self._node_count, self._relation_count, self._relation_type_counts = self._load_counts()
     
     def _init_database(self):
         """初始化数据库"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self._lock:
+            self._conn.executescript(_SQLITE_SCHEMA)
             
-            # 节点表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS concept_nodes (
-                    word TEXT PRIMARY KEY,
-                    concept_type TEXT,
-                    definition TEXT,
-                    frequency INTEGER DEFAULT 0,
-                    difficulty REAL DEFAULT 0.5,
-                    semantic_density REAL DEFAULT 0.0,
-                    centrality_score REAL DEFAULT 0.0,
-                    cluster_id TEXT,
-                    metadata TEXT,
-                    updated_at REAL
+            version = self._conn.execute('PRAGMA user_version').fetchone()[0]
+            if version < _SQLITE_SCHEMA_VERSION:
+                self._conn.executescript(
+                    'BEGIN;' + _SQLITE_QUANTIZE_MIGRATION +
+                    f'PRAGMA user_version={_SQLITE_SCHEMA_VERSION}; COMMIT;'
                 )
-            ''')
-            
-            # 关系表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS semantic_relations (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    source_word TEXT,
-                    target_word TEXT,
-                    relation_type TEXT,
-                    strength REAL,
-                    context TEXT,
-                    evidence TEXT,
-                    confidence REAL,
-                    created_at REAL,
-                    FOREIGN KEY (source_word) REFERENCES concept_nodes (word),
-                    FOREIGN KEY (target_word) REFERENCES concept_nodes (word)
-                )
-            ''')
-            
-            # 创建索引
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_nodes_word ON concept_nodes(word)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_relations_source ON semantic_relations(source_word)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_relations_target ON semantic_relations(target_word)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_relations_type ON semantic_relations(relation_type)')
-            
-            conn.commit()
+    
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+    
+    # 读缓存容量（按词计），超出后淘汰最久未使用的条目
+    _CACHE_SIZE = 4096
+    
+    def invalidate_cache(self, words: Optional[List[str]] = None):
+        """使读缓存失效（words为None时清空全部）"""
+        with self._lock:
+            if words is None:
+                self._node_cache.clear()
+                self._relation_cache.clear()
+                return
+            for word in words:
+                self._node_cache.pop(word, None)
+                self._relation_cache.pop(word, None)
+    
+    def _cache_put(self, cache: OrderedDict, key, value):
+        cache[key] = value
+        cache.move_to_end(key)
+        if len(cache) > self._CACHE_SIZE:
+            cache.popitem(last=False)
     
     def add_node(self, node: ConceptNode) -> bool:
         """添加节点"""
+        return self.add_nodes_batch([node]) == 1
+    
+    def add_relation(self, relation: SemanticRelation) -> bool:
+        """添加关系"""
+        return self.add_relations_batch([relation]) == 1
+    
+    def add_nodes_batch(self, nodes: List[ConceptNode]) -> int:
+        """批量添加节点（单事务 executemany）"""
+        if not nodes:
+            return 0
+        
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT OR REPLACE INTO concept_nodes 
-                    (word, concept_type, definition, frequency, difficulty, semantic_density, 
-                     centrality_score, cluster_id, metadata, updated_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    node.word, node.concept_type, node.definition, node.frequency,
-                    node.difficulty, node.semantic_density, node.centrality_score,
-                    node.cluster_id, json.dumps(node.metadata), time.time()
+            now = time.time()
+            rows = []
+            for node in nodes:
+                (word, concept_type, definition, frequency, difficulty,
+                 semantic_density, centrality_score, cluster_id, metadata) = node.as_row()
+                rows.append((
+                    word, concept_type, definition, frequency, _quantize(difficulty),
+                    _quantize(semantic_density), _quantize(centrality_score),
+                    cluster_id, _jdumps(metadata), now
                 ))
-                conn.commit()
-                return True
+            
+            words = {node.word for node in nodes}
+            with self._lock:
+                with self._conn as conn:
+                    # 替换已有节点不改变节点数，只统计新增的词
+                    new_count = len(words - self._existing_words(conn.cursor(), words))
+                    conn.executemany('''
+                        INSERT OR REPLACE INTO concept_nodes 
+                        (word, concept_type, definition, frequency, difficulty, semantic_density, 
+                         centrality_score, cluster_id, metadata, updated_at)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', rows)
+                self._node_count += new_count
+                for word in words:
+                    self._node_cache.pop(word, None)
+            self.write_version += 1
+            return len(rows)
         except Exception as e:
             logger.error(f"添加节点失败: {e}")
-            return False
+            return 0
     
-    def add_relation(self, relation: SemanticRelation) -> bool:
-        """添加关系"""
+    def add_relations_batch(self, relations: List[SemanticRelation]) -> int:
+        """批量添加关系（单事务 executemany）"""
+        if not relations:
+            return 0
+        
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT OR REPLACE INTO semantic_relations 
-                    (source_word, target_word, relation_type, strength, context, evidence, confidence, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    relation.source_word, relation.target_word, relation.relation_type,
-                    relation.strength, relation.context, json.dumps(relation.evidence),
-                    relation.confidence, relation.created_at
+            rows = []
+            for relation in relations:
+                (source_word, target_word, relation_type, strength,
+                 context, evidence, confidence, created_at) = relation.as_row()
+                rows.append((
+                    source_word, target_word, relation_type, _quantize(strength),
+                    context, _jdumps(evidence), _quantize(confidence), created_at
                 ))
-                conn.commit()
-                return True
+            
+            with self._lock:
+                with self._conn as conn:
+                    conn.executemany('''
+                        INSERT OR REPLACE INTO semantic_relations 
+                        (source_word, target_word, relation_type, strength, context, evidence, confidence, created_at)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', rows)
+                # 关系表无唯一约束，每行都是新增
+                self._relation_count += len(rows)
+                for relation in relations:
+                    self._relation_type_counts[relation.relation_type] += 1
+                    self._relation_cache.pop(relation.source_word, None)
+            self.write_version += 1
+            return len(rows)
         except Exception as e:
             logger.error(f"添加关系失败: {e}")
-            return False
+            return 0
+    
+    def ensure_nodes(self, words: Set[str]) -> int:
+        """为尚不存在的词创建占位节点（一次IN查询 + 一次executemany）"""
+        if not words:
+            return 0
+        
+        try:
+            now = time.time()
+            with self._lock:
+                with self._conn as conn:
+                    missing = set(words) - self._existing_words(conn.cursor(), words)
+                    conn.executemany('''
+                        INSERT INTO concept_nodes (word, concept_type, definition, metadata, updated_at)
+                        VALUES (?, 'concept', '', '{}', ?)
+                    ''', [(word, now) for word in missing])
+                self._node_count += len(missing)
+                for word in missing:
+                    self._node_cache.pop(word, None)
+            if missing:
+                self.write_version += 1
+            return len(missing)
+        except Exception as e:
+            logger.error(f"创建占位节点失败: {e}")
+            return 0
     
     def get_node(self, word: str) -> Optional[ConceptNode]:
-        """获取节点"""
+        """获取节点（LRU缓存）"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('SELECT * FROM concept_nodes WHERE word = ?', (word,))
-                row = cursor.fetchone()
+            with self._lock:
+                if word in self._node_cache:
+                    self._node_cache.move_to_end(word)
+                    return self._node_cache[word]
                 
-                if row:
-                    return ConceptNode(
-                        word=row[0],
-                        concept_type=row[1] or '',
-                        definition=row[2] or '',
-                        frequency=row[3] or 0,
-                        difficulty=row[4] or 0.5,
-                        semantic_density=row[5] or 0.0,
-                        centrality_score=row[6] or 0.0,
-                        cluster_id=row[7],
-                        metadata=json.loads(row[8]) if row[8] else {}
-                    )
+                node = self._load_node(word)
+                self._cache_put(self._node_cache, word, node)
+                return node
         except Exception as e:
             logger.error(f"获取节点失败: {e}")
         return None
     
+    def _load_node(self, word: str) -> Optional[ConceptNode]:
+        """从数据库读取节点"""
+        cursor = self._conn.cursor()
+        cursor.execute('SELECT * FROM concept_nodes WHERE word = ?', (word,))
+        row = cursor.fetchone()
+        
+        if row:
+            return ConceptNode(
+                word=row[0],
+                concept_type=row[1] or '',
+                definition=row[2] or '',
+                frequency=row[3] or 0,
+                difficulty=_dequantize(row[4]) or 0.5,
+                semantic_density=_dequantize(row[5]) or 0.0,
+                centrality_score=_dequantize(row[6]) or 0.0,
+                cluster_id=row[7],
+                metadata=json.loads(row[8]) if row[8] and row[8] not in _EMPTY_JSON else {}
+            )
+        return None
+    
     def get_relations(self, word: str, relation_types: Optional[List[str]] = None) -> List[SemanticRelation]:
-        """获取关系"""
+        """获取关系（LRU缓存，按词及关系类型组合缓存）"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                if relation_types:
-                    placeholders = ','.join('?' * len(relation_types))
-                    query = f'''
-                        SELECT * FROM semantic_relations 
-                        WHERE source_word = ? AND relation_type IN ({placeholders})
-                    '''
-                    cursor.execute(query, [word] + relation_types)
+            types_key = tuple(sorted(relation_types)) if relation_types else ()
+            
+            with self._lock:
+                word_cache = self._relation_cache.get(word)
+                if word_cache is not None:
+                    self._relation_cache.move_to_end(word)
+                    if types_key in word_cache:
+                        return list(word_cache[types_key])
                 else:
-                    cursor.execute('SELECT * FROM semantic_relations WHERE source_word = ?', (word,))
-                
-                relations = []
-                for row in cursor.fetchall():
-                    relation = SemanticRelation(
-                        source_word=row[1],
-                        target_word=row[2],
-                        relation_type=row[3],
-                        strength=row[4],
-                        context=row[5],
-                        evidence=json.loads(row[6]) if row[6] else [],
-                        confidence=row[7],
-                        created_at=row[8]
-                    )
-                    relations.append(relation)
+                    word_cache = {}
+                    self._cache_put(self._relation_cache, word, word_cache)
                 
-                return relations
+                relations = self._load_relations(word, relation_types)
+                word_cache[types_key] = relations
+                return list(relations)
         except Exception as e:
             logger.error(f"获取关系失败: {e}")
             return []
     
+    def _load_relations(self, word: str, relation_types: Optional[List[str]]) -> List[SemanticRelation]:
+        """从数据库读取关系"""
+        cursor = self._conn.cursor()
+        
+        if relation_types:
+            placeholders = ','.join('?' * len(relation_types))
+            query = f'''
+                SELECT * FROM semantic_relations 
+                WHERE source_word = ? AND relation_type IN ({placeholders})
+            '''
+            cursor.execute(query, [word] + list(relation_types))
+        else:
+            cursor.execute('SELECT * FROM semantic_relations WHERE source_word = ?', (word,))
+        
+        relations = []
+        for row in cursor.fetchall():
+            relation = SemanticRelation(
+                source_word=row[1],
+                target_word=row[2],
+                relation_type=row[3],
+                strength=_dequantize(row[4]),
+                context=row[5],
+                evidence=json.loads(row[6]) if row[6] and row[6] not in _EMPTY_JSON else [],
+                confidence=_dequantize(row[7]),
+                created_at=row[8]
+            )
+            relations.append(relation)
+        
+        return relations
+    
+    # 单条 IN 查询允许的最大参数数量（低于SQLite的默认变量上限）
+    _MAX_IN_PARAMS = 500
+    
+    def _existing_words(self, cursor, words: Set[str]) -> Set[str]:
+        """返回已存在于节点表中的词"""
+        words = list(words)
+        existing = set()
+        for i in range(0, len(words), self._MAX_IN_PARAMS):
+            chunk = words[i:i + self._MAX_IN_PARAMS]
+            placeholders = ','.join('?' * len(chunk))
+            cursor.execute(f'SELECT word FROM concept_nodes WHERE word IN ({placeholders})', chunk)
+            existing.update(row[0] for row in cursor.fetchall())
+        return existing
+    
+    def _fetch_edges(self, cursor, from_column: str, to_column: str, words: Set[str]) -> List[Tuple[str, str]]:
+        """按层批量获取边，通过 source/target 索引查找"""
+        words = list(words)
+        edges = []
+        for i in range(0, len(words), self._MAX_IN_PARAMS):
+            chunk = words[i:i + self._MAX_IN_PARAMS]
+            placeholders = ','.join('?' * len(chunk))
+            cursor.execute(
+                f'SELECT {from_column}, {to_column} FROM semantic_relations '
+                f'WHERE {from_column} IN ({placeholders})',
+                chunk
+            )
+            edges.extend(cursor.fetchall())
+        return edges
+    
     def find_path(self, source: str, target: str, max_depth: int = 3) -> Optional[List[str]]:
-        """查找路径（BFS实现）"""
+        """查找路径（双向BFS实现）
+        
+        路径最多包含 max_depth 个节点。两端交替扩展较小的一侧前沿，
+        每层只查询前沿节点的边，内存与查询量只随前沿大小增长。
+        """
+        if source == target:
+            return [source]
+        
+        max_edges = max_depth - 1
+        
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # 构建邻接表
-                cursor.execute('SELECT source_word, target_word FROM semantic_relations')
-                edges = cursor.fetchall()
+            with self._lock:
+                cursor = self._conn.cursor()
                 
-                graph = defaultdict(list)
-                for source_word, target_word in edges:
-                    graph[source_word].append(target_word)
+                # 节点 -> (父节点, 深度)；正向沿出边扩展，反向沿入边扩展
+                forward = {source: (None, 0)}
+                backward = {target: (None, 0)}
+                forward_frontier = {source}
+                backward_frontier = {target}
+                explored_edges = 0
                 
-                # BFS查找路径
-                queue = deque([(source, [source])])
-                visited = {source}
-                
-                while queue:
-                    current, path = queue.popleft()
+                while forward_frontier and backward_frontier and explored_edges < max_edges:
+                    if len(forward_frontier) <= len(backward_frontier):
+                        edges = self._fetch_edges(cursor, 'source_word', 'target_word', forward_frontier)
+                        visited, other = forward, backward
+                    else:
+                        edges = self._fetch_edges(cursor, 'target_word', 'source_word', backward_frontier)
+                        visited, other = backward, forward
+                    
+                    next_frontier = set()
+                    best_meeting = None
+                    for from_word, to_word in edges:
+                        if to_word in visited:
+                            continue
+                        visited[to_word] = (from_word, visited[from_word][1] + 1)
+                        next_frontier.add(to_word)
+                        
+                        # 同一层内选择总长度最短的交汇点
+                        if to_word in other and (
+                            best_meeting is None or other[to_word][1] < other[best_meeting][1]
+                        ):
+                            best_meeting = to_word
                     
-                    if len(path) > max_depth:
-                        continue
+                    explored_edges += 1
                     
-                    if current == target:
-                        return path
+                    if best_meeting is not None:
+                        return self._join_bfs_paths(best_meeting, forward, backward)
                     
-                    for neighbor in graph[current]:
-                        if neighbor not in visited:
-                            visited.add(neighbor)
-                            queue.append((neighbor, path + [neighbor]))
+                    if visited is forward:
+                        forward_frontier = next_frontier
+                    else:
+                        backward_frontier = next_frontier
                 
                 return None
         except Exception as e:
             logger.error(f"查找路径失败: {e}")
             return None
     
+    @staticmethod
+    def _join_bfs_paths(meeting: str, forward: Dict[str, Tuple[Optional[str], int]],
+                        backward: Dict[str, Tuple[Optional[str], int]]) -> List[str]:
+        """沿两侧父指针拼接完整路径"""
+        path = []
+        node = meeting
+        while node is not None:
+            path.append(node)
+            node = forward[node][0]
+        path.reverse()
+        
+        node = backward[meeting][0]
+        while node is not None:
+            path.append(node)
+            node = backward[node][0]
+        
+        return path
+    
     def get_neighbors(self, word: str, depth: int = 1, relation_types: Optional[List[str]] = None) -> List[str]:
         """获取邻居节点"""
+        if depth < 1:
+            return []
+        
         try:
-            neighbors = set()
-            current_level = {word}
+            # 递归CTE一次完成BFS，沿idx_relations_source_type逐层扩展
+            type_filter = ''
+            params: List[Any] = [word, depth]
+            if relation_types:
+                type_filter = f"AND r.relation_type IN ({','.join('?' * len(relation_types))})"
+                params.extend(relation_types)
+            params.append(word)  # 移除自己
             
-            for _ in range(depth):
-                next_level = set()
-                for current_word in current_level:
-                    relations = self.get_relations(current_word, relation_types)
-                    for relation in relations:
-                        next_level.add(relation.target_word)
-                
-                neighbors.update(next_level)
-                current_level = next_level
-                
-                if not current_level:
-                    break
-            
-            neighbors.discard(word)  # 移除自己
-            return list(neighbors)
+            with self._lock:
+                cursor = self._conn.cursor()
+                cursor.execute(f'''
+                    WITH RECURSIVE reach(word, d) AS (
+                        SELECT ?, 0
+                        UNION
+                        SELECT r.target_word, reach.d + 1
+                        FROM reach JOIN semantic_relations r ON r.source_word = reach.word
+                        WHERE reach.d < ? {type_filter}
+                    )
+                    SELECT DISTINCT word FROM reach WHERE word != ?
+                ''', params)
+                return [row[0] for row in cursor.fetchall()]
         except Exception as e:
             logger.error(f"获取邻居节点失败: {e}")
             return []
     
+    def get_edges_within(self, words: Set[str]) -> List[Tuple[str, str]]:
+        """获取两端都在给定词集合内的关系，按源词批量查询"""
+        try:
+            with self._lock:
+                edges = self._fetch_edges(self._conn.cursor(), 'source_word', 'target_word', words)
+            return [(source, target) for source, target in edges if target in words]
+        except Exception as e:
+            logger.error(f"获取聚类内关系失败: {e}")
+            return []
+    
+    def get_counts(self) -> Tuple[int, int, Dict[str, int]]:
+        """获取节点数、关系数及关系类型分布（增量维护，无需扫表）"""
+        with self._lock:
+            return self._node_count, self._relation_count, dict(self._relation_type_counts)
+    
+    def _load_counts(self) -> Tuple[int, int, Counter]:
+        """从数据库统计节点数、关系数及关系类型分布"""
+        with self._lock:
+            cursor = self._conn.cursor()
+            
+            # 节点数量
+            cursor.execute('SELECT COUNT(*) FROM concept_nodes')
+            node_count = cursor.fetchone()[0]
+            
+            # 关系数量
+            cursor.execute('SELECT COUNT(*) FROM semantic_relations')
+            relation_count = cursor.fetchone()[0]
+            
+            # 关系类型分布
+            cursor.execute('SELECT relation_type, COUNT(*) FROM semantic_relations GROUP BY relation_type')
+            relation_types = Counter(dict(cursor.fetchall()))
+        
+        return node_count, relation_count, relation_types
+    
     def compute_centrality(self) -> Dict[str, float]:
         """计算中心性"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
+            with self._lock:
+                cursor = self._conn.cursor()
                 
-                # 计算度中心性
+                # 计算度中心性（出度 + 入度，一次查询完成）
                 cursor.execute('''
-                    SELECT source_word, COUNT(*) as out_degree
-                    FROM semantic_relations
-                    GROUP BY source_word
+                    SELECT word, SUM(degree) FROM (
+                        SELECT source_word AS word, COUNT(*) AS degree
+                        FROM semantic_relations GROUP BY source_word
+                        UNION ALL
+                        SELECT target_word AS word, COUNT(*) AS degree
+                        FROM semantic_relations GROUP BY target_word
+                    ) GROUP BY word
                 ''')
-                out_degrees = dict(cursor.fetchall())
-                
-                cursor.execute('''
-                    SELECT target_word, COUNT(*) as in_degree
-                    FROM semantic_relations
-                    GROUP BY target_word
-                ''')
-                in_degrees = dict(cursor.fetchall())
-                
-                # 计算总度数
-                all_words = set(out_degrees.keys()) | set(in_degrees.keys())
-                degrees = {}
-                for word in all_words:
-                    degrees[word] = out_degrees.get(word, 0) + in_degrees.get(word, 0)
+                rows = cursor.fetchall()
                 
                 # 标准化
-                max_degree = max(degrees.values()) if degrees else 1
-                centrality = {word: degree / max_degree for word, degree in degrees.items()}
-                
-                return centrality
+                return _normalize_degrees([row[0] for row in rows], (row[1] for row in rows))
         except Exception as e:
             logger.error(f"计算中心性失败: {e}")
             return {}
@@ -668,57 +1294,119 @@ class SQLiteGraphBackend(GraphBackend):
     def detect_communities(self) -> Dict[str, str]:
         """检测社区/聚类"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
+            with self._lock:
+                cursor = self._conn.cursor()
                 
                 # 获取强关系
                 cursor.execute('''
                     SELECT source_word, target_word, strength
                     FROM semantic_relations
-                    WHERE strength > 0.7
-                    ORDER BY strength DESC
-                ''')
-                
-                # 使用并查集
-                parent = {}
-                
-                def find(x):
-                    if x not in parent:
-                        parent[x] = x
-                    if parent[x] != x:
-                        parent[x] = find(parent[x])
-                    return parent[x]
-                
-                def union(x, y):
-                    px, py = find(x), find(y)
-                    if px != py:
-                        parent[px] = py
-                
-                # 建立连接
-                for source_word, target_word, strength in cursor.fetchall():
-                    union(source_word, target_word)
-                
-                # 分配聚类ID
-                clusters = {}
-                cluster_counter = 0
-                cluster_map = {}
+                    WHERE strength > ?
+                ''', (_STRONG_STRENGTH_Q,))
                 
-                for word in parent:
-                    root = find(word)
-                    if root not in cluster_map:
-                        cluster_map[root] = f"cluster_{cluster_counter}"
-                        cluster_counter += 1
-                    clusters[word] = cluster_map[root]
-                
-                return clusters
+                # Louvain模块度优化
+                return _louvain_communities(
+                    (source_word, target_word, _dequantize(strength))
+                    for source_word, target_word, strength in cursor.fetchall()
+                )
         except Exception as e:
             logger.error(f"检测社区失败: {e}")
             return {}
 
 
+# 学习词汇入图队列：容量上限、单批最大词数、批次间隔（秒）
+_INGEST_QUEUE_SIZE = 10000
+_INGEST_BATCH_SIZE = 256
+_INGEST_INTERVAL = 0.05
+
+def _parse_ai_json(ai_response: str) -> Any:
+    """解析AI响应中的JSON：取首个'{'到最后一个'}'之间的内容"""
+    start, end = ai_response.find('{'), ai_response.rfind('}')
+    if start >= 0 and end > start:
+        return json.loads(ai_response[start:end + 1])
+    return json.loads(ai_response)
+
+
+# 同时进行的AI语义分析请求上限，避免触发服务商限流
+_AI_CONCURRENCY = 8
+
+# 单个AI请求合并分析的最大词数，及每个词预留的输出token数
+_AI_BATCH_WORDS = 10
+_AI_BATCH_TOKENS_PER_WORD = 400
+
+# AI响应中的关系类别 -> 关系类型
+_AI_RELATION_CATEGORIES = {
+    'synonyms': 'synonym',
+    'antonyms': 'antonym',
+    'hypernyms': 'hypernym',
+    'hyponyms': 'hyponym',
+    'related': 'related'
+}
+
+# 各关系类型的默认强度
+_RELATION_STRENGTH = {
+    'synonym': 0.9,
+    'antonym': 0.8,
+    'hypernym': 0.7,
+    'hyponym': 0.7,
+    'related': 0.5
+}
+
+
 class KnowledgeGraphEngine:
     """知识图谱引擎"""
     
+    # AI语义分析提示词模板
+    _PROMPT_TEMPLATE = """
+分析词汇 "{word}" 的语义关系。
+
+定义: {definition}
+
+请找出与此词汇相关的：
+1. 同义词 (synonyms)
+2. 反义词 (antonyms) 
+3. 上位词 (hypernyms) - 更一般的概念
+4. 下位词 (hyponyms) - 更具体的概念
+5. 相关词 (related) - 语义相关的词汇
+
+请以JSON格式返回结果：
+{{
+    "synonyms": ["word1", "word2"],
+    "antonyms": ["word3", "word4"],
+    "hypernyms": ["word5", "word6"],
+    "hyponyms": ["word7", "word8"],
+    "related": ["word9", "word10"]
+}}
+
+只返回确信的关系，如果某类关系没有明显的词汇，返回空数组。
+"""
+    
+    _BATCH_PROMPT_TEMPLATE = """
+分析以下每个词汇的语义关系。
+
+{word_lines}
+
+请为每个词汇找出与其相关的：
+1. 同义词 (synonyms)
+2. 反义词 (antonyms) 
+3. 上位词 (hypernyms) - 更一般的概念
+4. 下位词 (hyponyms) - 更具体的概念
+5. 相关词 (related) - 语义相关的词汇
+
+请以JSON格式返回结果，以被分析的词汇为键：
+{{
+    "word": {{
+        "synonyms": ["word1", "word2"],
+        "antonyms": ["word3", "word4"],
+        "hypernyms": ["word5", "word6"],
+        "hyponyms": ["word7", "word8"],
+        "related": ["word9", "word10"]
+    }}
+}}
+
+只返回确信的关系，如果某类关系没有明显的词汇，返回空数组。
+"""
+    
     def __init__(self, use_neo4j: bool = False, neo4j_config: Optional[Dict[str, str]] = None):
         self.use_neo4j = use_neo4j and NEO4J_AVAILABLE
         
@@ -740,6 +1428,20 @@ class KnowledgeGraphEngine:
             logger.info("使用SQLite图数据库后端")
         
         self.ai_manager = get_ai_model_manager()
+        
+        # 统计信息缓存: (后端写入计数, 统计结果)，后端有新写入时重新计算
+        self._stats_cache: Optional[Tuple[int, Dict[str, Any]]] = None
+        # 语义邻居缓存按实例创建，随引擎一起释放，不在实例间共享
+        self._get_semantic_neighbors_cached = lru_cache(maxsize=4096)(self._query_semantic_neighbors)
+        
+        # 学习事件只负责入队，由单个后台线程批量写入节点并发现关系
+        self._ingest_queue: "queue.Queue[Optional[Tuple[str, str]]]" = queue.Queue(maxsize=_INGEST_QUEUE_SIZE)
+        self._ingest_thread = threading.Thread(target=self._ingest_loop, daemon=True)
+        self._ingest_thread.start()
+        # 进程退出时处理队列中剩余的词汇并关闭后端连接
+        self._closed = False
+        atexit.register(self.close)
+        
         self._register_event_handlers()
         
         logger.info("知识图谱引擎已初始化")
@@ -752,84 +1454,146 @@ class KnowledgeGraphEngine:
                 word = event.data.get('word')
                 definition = event.data.get('definition')
                 
+                if word:
+                    # 词汇学习后其节点/关系即将更新，先使缓存失效
+                    self.backend.invalidate_cache([word])
+                
                 if word and definition:
-                    # 异步建立语义关系
-                    import asyncio
-                    asyncio.create_task(self._build_semantic_relations(word, definition))
+                    # 交给后台线程建立语义关系，队列满时丢弃
+                    try:
+                        self._ingest_queue.put_nowait((word, definition))
+                    except queue.Full:
+                        logger.warning(f"语义关系队列已满，跳过词汇: {word}")
             except Exception as e:
                 logger.error(f"处理词汇学习事件失败: {e}")
             return False
         
         register_event_handler("vocabulary.learned", handle_vocabulary_learned)
     
-    async def _build_semantic_relations(self, word: str, definition: str):
-        """异步建立语义关系"""
+    def _ingest_loop(self):
+        """后台线程：合并排队的学习词汇，批量建立语义关系"""
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
         try:
+            while True:
+                batch = [self._ingest_queue.get()]
+                while len(batch) < _INGEST_BATCH_SIZE:
+                    try:
+                        batch.append(self._ingest_queue.get_nowait())
+                    except queue.Empty:
+                        break
+                
+                items = [item for item in batch if item is not None]
+                if items:
+                    loop.run_until_complete(self._build_semantic_relations(items))
+                
+                for _ in batch:
+                    self._ingest_queue.task_done()
+                if len(items) < len(batch):
+                    break
+                time.sleep(_INGEST_INTERVAL)
+        finally:
+            loop.close()
+    
+    async def _build_semantic_relations(self, items: List[Tuple[str, str]]):
+        """批量建立语义关系"""
+        try:
+            # 同一词多次入队时以最新定义为准
+            definitions = dict(items)
+            
             # 添加或更新节点
-            node = ConceptNode(
-                word=word,
-                concept_type=self._detect_concept_type(word, definition),
-                definition=definition
-            )
-            self.backend.add_node(node)
+            self.backend.add_nodes_batch([
+                ConceptNode(
+                    word=word,
+                    concept_type=self._detect_concept_type(word, definition),
+                    definition=definition
+                )
+                for word, definition in definitions.items()
+            ])
             
             # 使用AI发现语义关系
-            await self._discover_relations_with_ai(word, definition)
+            await self.discover_many(definitions)
             
         except Exception as e:
             logger.error(f"建立语义关系失败: {e}")
     
+    async def discover_many(self, definitions: Dict[str, str]):
+        """并发发现多个词汇的语义关系
+        
+        多个词合并为一个AI请求，并发请求数受信号量限制；
+        所有请求完成后，关系在一次批量写入中提交。
+        """
+        semaphore = asyncio.Semaphore(_AI_CONCURRENCY)
+        pending = list(definitions.items())
+        chunks = [pending[i:i + _AI_BATCH_WORDS] for i in range(0, len(pending), _AI_BATCH_WORDS)]
+        
+        async def discover(chunk: List[Tuple[str, str]]) -> Dict[str, Dict[str, Any]]:
+            async with semaphore:
+                if len(chunk) == 1:
+                    return await self._request_ai_relations(*chunk[0])
+                return await self._request_ai_relations_batch(chunk)
+        
+        results = await asyncio.gather(*(discover(chunk) for chunk in chunks), return_exceptions=True)
+        
+        relations_by_word = {}
+        for result in results:
+            if isinstance(result, BaseException):
+                logger.error(f"AI语义关系发现失败: {result}")
+            else:
+                relations_by_word.update(result)
+        
+        self._write_ai_relations(relations_by_word)
+    
+    def flush(self):
+        """等待所有排队的词汇处理完成"""
+        if self._ingest_thread.is_alive():
+            self._ingest_queue.join()
+    
+    def close(self):
+        """处理剩余词汇并关闭图数据库后端"""
+        if self._closed:
+            return
+        self._closed = True
+        atexit.unregister(self.close)
+        
+        if self._ingest_thread.is_alive():
+            self._ingest_queue.put(None)
+            self._ingest_thread.join()
+        self.backend.close()
+    
     def _detect_concept_type(self, word: str, definition: str) -> str:
         """检测概念类型"""
         # 简化的词性检测
-        definition_lower = definition.lower()
+        for concept_type, pattern in _CONCEPT_TYPE_PATTERNS:
+            if pattern.search(definition):
+                return concept_type
+        return 'noun'
+    
+    def _select_semantic_model(self) -> Optional[str]:
+        """选择用于语义分析的AI模型"""
+        # 查找支持语义理解的AI模型
+        suitable_models = self.ai_manager.get_models_by_capability(ModelCapability.SEMANTIC_UNDERSTANDING)
+        if not suitable_models:
+            suitable_models = self.ai_manager.get_models_by_capability(ModelCapability.TEXT_GENERATION)
         
-        if any(marker in definition_lower for marker in ['verb', 'action', 'to do', 'process']):
-            return 'verb'
-        elif any(marker in definition_lower for marker in ['adjective', 'quality', 'characteristic']):
-            return 'adjective'
-        elif any(marker in definition_lower for marker in ['adverb', 'manner', 'way']):
-            return 'adverb'
-        else:
-            return 'noun'
+        if not suitable_models:
+            logger.warning("没有可用的AI模型进行语义分析")
+            return None
+        
+        return suitable_models[0]
     
     async def _discover_relations_with_ai(self, word: str, definition: str):
         """使用AI发现语义关系"""
+        self._write_ai_relations(await self._request_ai_relations(word, definition))
+    
+    async def _request_ai_relations(self, word: str, definition: str) -> Dict[str, Dict[str, Any]]:
+        """请求AI分析单个词汇，返回 {词: 关系数据}"""
         try:
-            # 查找支持语义理解的AI模型
-            suitable_models = self.ai_manager.get_models_by_capability(ModelCapability.SEMANTIC_UNDERSTANDING)
-            if not suitable_models:
-                suitable_models = self.ai_manager.get_models_by_capability(ModelCapability.TEXT_GENERATION)
-            
-            if not suitable_models:
-                logger.warning("没有可用的AI模型进行语义分析")
-                return
+            model_id = self._select_semantic_model()
+            if not model_id:
+                return {}
             
-            model_id = suitable_models[0]
-            
-            prompt = f"""
-分析词汇 "{word}" 的语义关系。
-
-定义: {definition}
-
-请找出与此词汇相关的：
-1. 同义词 (synonyms)
-2. 反义词 (antonyms) 
-3. 上位词 (hypernyms) - 更一般的概念
-4. 下位词 (hyponyms) - 更具体的概念
-5. 相关词 (related) - 语义相关的词汇
-
-请以JSON格式返回结果：
-{{
-    "synonyms": ["word1", "word2"],
-    "antonyms": ["word3", "word4"],
-    "hypernyms": ["word5", "word6"],
-    "hyponyms": ["word7", "word8"],
-    "related": ["word9", "word10"]
-}}
-
-只返回确信的关系，如果某类关系没有明显的词汇，返回空数组。
-"""
+            prompt = self._PROMPT_TEMPLATE.format(word=word, definition=definition)
             
             request = AIRequest(
                 prompt=prompt,
@@ -845,98 +1609,166 @@ class KnowledgeGraphEngine:
             response = await self.ai_manager.generate_text(model_id, request)
             
             if response.success:
-                await self._process_ai_relations(word, response.content)
+                relations_data = _parse_ai_json(response.content)
+                if isinstance(relations_data, dict):
+                    return {word: relations_data}
             
         except Exception as e:
             logger.error(f"AI语义关系发现失败: {e}")
+        return {}
+    
+    async def _request_ai_relations_batch(self, items: List[Tuple[str, str]]) -> Dict[str, Dict[str, Any]]:
+        """使用一个AI请求分析多个词汇，返回 {词: 关系数据}"""
+        try:
+            model_id = self._select_semantic_model()
+            if not model_id:
+                return {}
+            
+            word_lines = "\n".join(f"- {word}: {definition}" for word, definition in items)
+            prompt = self._BATCH_PROMPT_TEMPLATE.format(word_lines=word_lines)
+            
+            request = AIRequest(
+                prompt=prompt,
+                system_prompt="你是一个语言学专家，专门分析词汇间的语义关系。请严格按照JSON格式返回结果。",
+                max_tokens=_AI_BATCH_TOKENS_PER_WORD * len(items),
+                temperature=0.3,
+                context={
+                    'task_type': 'semantic_analysis',
+                    'words': [word for word, _ in items]
+                }
+            )
+            
+            response = await self.ai_manager.generate_text(model_id, request)
+            
+            if response.success:
+                batch_data = _parse_ai_json(response.content)
+                if not isinstance(batch_data, dict):
+                    logger.warning("AI批量语义关系响应不是JSON对象，已忽略")
+                    return {}
+                return {
+                    word: batch_data[word] for word, _ in items
+                    if isinstance(batch_data.get(word), dict)
+                }
+            
+        except Exception as e:
+            logger.error(f"AI批量语义关系发现失败: {e}")
+        return {}
     
     async def _process_ai_relations(self, source_word: str, ai_response: str):
         """处理AI关系分析结果"""
         try:
-            import re
-            
-            # 尝试提取JSON
-            json_match = re.search(r'\{.*\}', ai_response, re.DOTALL)
-            if json_match:
-                json_str = json_match.group()
-                relations_data = json.loads(json_str)
-            else:
-                relations_data = json.loads(ai_response)
+            self._write_ai_relations({source_word: _parse_ai_json(ai_response)})
+        except Exception as e:
+            logger.error(f"处理AI关系结果失败: {e}")
+    
+    def _write_ai_relations(self, relations_by_word: Dict[str, Dict[str, Any]]):
+        """将多个词汇的AI关系分析结果在一次批量写入中提交"""
+        try:
+            relations = []
+            relation_counts = {}
+            for source_word, relations_data in relations_by_word.items():
+                # 单个词的结果异常只跳过该词，不影响同批其他词的关系写入
+                try:
+                    word_relations, relations_count = self._build_ai_relations(source_word, relations_data)
+                except Exception as e:
+                    logger.warning(f"跳过无效的AI关系结果 {source_word}: {e}")
+                    continue
+                relation_counts[source_word] = relations_count
+                relations.extend(word_relations)
             
-            # 建立关系
-            relation_mappings = {
-                'synonyms': 'synonym',
-                'antonyms': 'antonym', 
-                'hypernyms': 'hypernym',
-                'hyponyms': 'hyponym',
-                'related': 'related'
-            }
+            if not relations:
+                return
             
-            for relation_category, relation_type in relation_mappings.items():
-                if relation_category in relations_data:
-                    for target_word in relations_data[relation_category]:
-                        if target_word and target_word != source_word:
-                            # 计算关系强度
-                            strength = self._calculate_relation_strength(relation_type)
-                            
-                            relation = SemanticRelation(
-                                source_word=source_word,
-                                target_word=target_word.strip(),
-                                relation_type=relation_type,
-                                strength=strength,
-                                confidence=0.8,  # AI生成的关系置信度
-                                evidence=[f"AI analysis of {source_word}"]
-                            )
-                            
-                            self.backend.add_relation(relation)
-                            
-                            # 如果是同义词，建立双向关系
-                            if relation_type == 'synonym':
-                                reverse_relation = SemanticRelation(
-                                    source_word=target_word.strip(),
-                                    target_word=source_word,
-                                    relation_type=relation_type,
-                                    strength=strength,
-                                    confidence=0.8,
-                                    evidence=[f"AI analysis of {source_word}"]
-                                )
-                                self.backend.add_relation(reverse_relation)
+            # 目标词缺少节点时先建立占位节点，再在一个事务中写入所有关系
+            self.backend.ensure_nodes({relation.target_word for relation in relations})
+            self.backend.add_relations_batch(relations)
             
             # 发送事件
-            publish_event("knowledge_graph.relations_updated", {
-                'source_word': source_word,
-                'relations_count': sum(len(words) for words in relations_data.values())
-            }, "knowledge_graph")
+            for source_word, relations_count in relation_counts.items():
+                if relations_count:
+                    publish_event("knowledge_graph.relations_updated", {
+                        'source_word': source_word,
+                        'relations_count': relations_count
+                    }, "knowledge_graph")
             
         except Exception as e:
             logger.error(f"处理AI关系结果失败: {e}")
     
+    def _build_ai_relations(self, source_word: str,
+                            relations_data: Dict[str, Any]) -> Tuple[List[SemanticRelation], int]:
+        """由单个词汇的AI关系分析结果构建关系，返回 (关系列表, 关系数)"""
+        # 建立关系：只遍历响应中实际出现的类别，未知类别或格式不符的内容直接跳过
+        relations = []
+        relations_count = 0  # 实际建立的关系数（不含同义词的反向边）
+        if not isinstance(relations_data, dict):
+            return relations, relations_count
+        
+        evidence = [f"AI analysis of {source_word}"]  # 本次分析的所有关系共享同一证据
+        for relation_category, target_words in relations_data.items():
+            relation_type = _AI_RELATION_CATEGORIES.get(relation_category)
+            if relation_type is None or not isinstance(target_words, list):
+                continue
+            
+            # 计算关系强度
+            strength = _RELATION_STRENGTH.get(relation_type, 0.5)
+            for target_word in target_words:
+                if not isinstance(target_word, str):
+                    continue
+                target_word = target_word.strip()
+                if target_word and target_word != source_word:
+                    relation = SemanticRelation(
+                        source_word=source_word,
+                        target_word=target_word,
+                        relation_type=relation_type,
+                        strength=strength,
+                        confidence=0.8,  # AI生成的关系置信度
+                        evidence=evidence
+                    )
+                    
+                    relations.append(relation)
+                    relations_count += 1
+                    
+                    # 如果是同义词，建立双向关系
+                    if relation_type == 'synonym':
+                        reverse_relation = SemanticRelation(
+                            source_word=target_word,
+                            target_word=source_word,
+                            relation_type=relation_type,
+                            strength=strength,
+                            confidence=0.8,
+                            evidence=evidence
+                        )
+                        relations.append(reverse_relation)
+        
+        return relations, relations_count
+    
     def _calculate_relation_strength(self, relation_type: str) -> float:
         """计算关系强度"""
-        strength_map = {
-            'synonym': 0.9,
-            'antonym': 0.8,
-            'hypernym': 0.7,
-            'hyponym': 0.7,
-            'related': 0.5
-        }
-        return strength_map.get(relation_type, 0.5)
+        return _RELATION_STRENGTH.get(relation_type, 0.5)
     
     def get_semantic_neighbors(self, word: str, max_neighbors: int = 10,
                               relation_types: Optional[List[str]] = None) -> List[Tuple[str, float]]:
-        """获取语义邻居"""
+        """获取语义邻居（结果按后端写入计数缓存）"""
         try:
-            relations = self.backend.get_relations(word, relation_types)
-            
-            # 按强度排序
-            neighbors = [(rel.target_word, rel.strength) for rel in relations]
-            neighbors.sort(key=lambda x: x[1], reverse=True)
-            
-            return neighbors[:max_neighbors]
+            types_key = tuple(sorted(relation_types)) if relation_types else ()
+            return list(self._get_semantic_neighbors_cached(
+                word, max_neighbors, types_key, self.backend.write_version
+            ))
         except Exception as e:
             logger.error(f"获取语义邻居失败: {e}")
             return []
     
+    def _query_semantic_neighbors(self, word: str, max_neighbors: int,
+                                  relation_types: Tuple[str, ...],
+                                  write_version: int) -> Tuple[Tuple[str, float], ...]:
+        """查询并排序语义邻居；write_version仅作缓存键，后端写入后旧条目不再命中"""
+        relations = self.backend.get_relations(word, list(relation_types) or None)
+        
+        # 按强度取前max_neighbors个
+        return tuple(heapq.nlargest(
+            max_neighbors, ((rel.target_word, rel.strength) for rel in relations), key=lambda x: x[1]
+        ))
+    
     def find_semantic_path(self, source: str, target: str, max_depth: int = 3) -> Optional[List[str]]:
         """查找语义路径"""
         return self.backend.find_path(source, target, max_depth)
@@ -946,27 +1778,34 @@ class KnowledgeGraphEngine:
         try:
             communities = self.backend.detect_communities()
             
-            # 统计聚类大小
-            cluster_sizes = defaultdict(list)
+            # 先统计聚类大小，只为达到最小规模的聚类收集成员
+            cluster_sizes = Counter(communities.values())
+            kept = {cluster_id for cluster_id, size in cluster_sizes.items() if size >= min_size}
+            
+            cluster_words = defaultdict(list)
             for word, cluster_id in communities.items():
-                cluster_sizes[cluster_id].append(word)
+                if cluster_id in kept:
+                    cluster_words[cluster_id].append(word)
             
             # 创建聚类对象
             clusters = []
-            for cluster_id, words in cluster_sizes.items():
-                if len(words) >= min_size:
-                    # 选择中心词（暂时选择第一个）
-                    centroid_word = words[0]
-                    
-                    cluster = SemanticCluster(
-                        cluster_id=cluster_id,
-                        name=f"Cluster {cluster_id}",
-                        description=f"Semantic cluster with {len(words)} words",
-                        words=words,
-                        centroid_word=centroid_word,
-                        size=len(words)
-                    )
-                    clusters.append(cluster)
+            for cluster_id, words in cluster_words.items():
+                # 选择聚类内度数（另一端也在聚类中的关系数）最高的词作为中心词
+                degrees = Counter()
+                for source, target in self.backend.get_edges_within(set(words)):
+                    degrees[source] += 1
+                    degrees[target] += 1
+                centroid_word = max(words, key=degrees.__getitem__)
+                
+                cluster = SemanticCluster(
+                    cluster_id=cluster_id,
+                    name=f"Cluster {cluster_id}",
+                    description=f"Semantic cluster with {len(words)} words",
+                    words=words,
+                    centroid_word=centroid_word,
+                    size=len(words)
+                )
+                clusters.append(cluster)
             
             return clusters
         except Exception as e:
@@ -994,9 +1833,11 @@ class KnowledgeGraphEngine:
             neighbors2 = set(self.backend.get_neighbors(word2, depth=1))
             
             if neighbors1 and neighbors2:
-                intersection = neighbors1 & neighbors2
-                union = neighbors1 | neighbors2
-                jaccard_similarity = len(intersection) / len(union)
+                # |A∪B| = |A| + |B| - |A∩B|，只需遍历较小集合求交集大小
+                smaller, larger = sorted((neighbors1, neighbors2), key=len)
+                intersection = sum(1 for neighbor in smaller if neighbor in larger)
+                union = len(neighbors1) + len(neighbors2) - intersection
+                jaccard_similarity = intersection / union
                 return min(0.6, jaccard_similarity)
             
             return 0.0
@@ -1005,35 +1846,30 @@ class KnowledgeGraphEngine:
             return 0.0
     
     def get_knowledge_graph_stats(self) -> Dict[str, Any]:
-        """获取知识图谱统计"""
+        """获取知识图谱统计（后端无新写入时返回缓存结果）"""
+        write_version = self.backend.write_version
+        if self._stats_cache is not None and self._stats_cache[0] == write_version:
+            stats = self._stats_cache[1]
+            return {**stats, 'relation_types': dict(stats['relation_types'])}
+        
         try:
-            with sqlite3.connect(self.backend.db_path if hasattr(self.backend, 'db_path') else ":memory:") as conn:
-                cursor = conn.cursor()
-                
-                # 节点数量
-                cursor.execute('SELECT COUNT(*) FROM concept_nodes')
-                node_count = cursor.fetchone()[0]
-                
-                # 关系数量
-                cursor.execute('SELECT COUNT(*) FROM semantic_relations')
-                relation_count = cursor.fetchone()[0]
-                
-                # 关系类型分布
-                cursor.execute('SELECT relation_type, COUNT(*) FROM semantic_relations GROUP BY relation_type')
-                relation_types = dict(cursor.fetchall())
-                
-                # 计算图密度
-                max_edges = node_count * (node_count - 1) if node_count > 1 else 1
-                density = relation_count / max_edges
-                
-                return {
-                    'node_count': node_count,
-                    'relation_count': relation_count,
-                    'relation_types': relation_types,
-                    'graph_density': density,
-                    'backend_type': 'Neo4j' if self.use_neo4j else 'SQLite',
-                    'average_degree': (2 * relation_count) / max(1, node_count)
-                }
+            # 复用后端的长连接/会话
+            node_count, relation_count, relation_types = self.backend.get_counts()
+            
+            # 计算图密度
+            max_edges = node_count * (node_count - 1) if node_count > 1 else 1
+            density = relation_count / max_edges
+            
+            stats = {
+                'node_count': node_count,
+                'relation_count': relation_count,
+                'relation_types': relation_types,
+                'graph_density': density,
+                'backend_type': 'Neo4j' if self.use_neo4j else 'SQLite',
+                'average_degree': (2 * relation_count) / max(1, node_count)
+            }
+            self._stats_cache = (write_version, stats)
+            return {**stats, 'relation_types': dict(relation_types)}
         except Exception as e:
             logger.error(f"获取统计信息失败: {e}")
             return {
@@ -3,23 +3,339 @@ Learning Statistics Module
 学习统计模块 - 追踪用户学习进度和表现
 """
 
+import atexit
 import json
 import logging
 import os
+import queue
 import sqlite3
+import threading
 import time
-from collections import Counter, defaultdict
+from collections import Counter, OrderedDict, defaultdict
 from contextlib import contextmanager
-from dataclasses import asdict, dataclass
-from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
+from datetime import datetime
+from operator import attrgetter
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 from .resource_path import resource_path
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+# 用UPSERT代替INSERT OR REPLACE：冲突时原地更新，不触发删除+插入，行数触发器保持准确
+_SQL_INSERT_SESSION = '''
+    INSERT INTO test_sessions 
+    (session_id, test_type, test_module, start_time, end_time, 
+     total_questions, correct_answers, score_percentage, time_spent, 
+     avg_time_per_question, test_mode, difficulty_level)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(session_id) DO UPDATE SET
+        test_type = excluded.test_type,
+        test_module = excluded.test_module,
+        start_time = excluded.start_time,
+        end_time = excluded.end_time,
+        total_questions = excluded.total_questions,
+        correct_answers = excluded.correct_answers,
+        score_percentage = excluded.score_percentage,
+        time_spent = excluded.time_spent,
+        avg_time_per_question = excluded.avg_time_per_question,
+        test_mode = excluded.test_mode,
+        difficulty_level = excluded.difficulty_level
+'''
+
+_SQL_SAVE_WORD_STATS = '''
+    INSERT INTO word_statistics 
+    (word, total_attempts, correct_attempts, wrong_attempts, 
+     first_seen, last_seen, avg_response_time, mastery_level,
+     consecutive_correct, consecutive_wrong)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(word) DO UPDATE SET
+        total_attempts = excluded.total_attempts,
+        correct_attempts = excluded.correct_attempts,
+        wrong_attempts = excluded.wrong_attempts,
+        first_seen = excluded.first_seen,
+        last_seen = excluded.last_seen,
+        avg_response_time = excluded.avg_response_time,
+        mastery_level = excluded.mastery_level,
+        consecutive_correct = excluded.consecutive_correct,
+        consecutive_wrong = excluded.consecutive_wrong
+'''
+
+# 会话总计，由触发器维护的session_totals单行提供，无需扫描会话表
+_SQL_SESSION_TOTALS = '''
+    SELECT sessions, questions, correct, score_sum, time_spent
+    FROM session_totals
+    WHERE id = 0
+'''
+
+# 练习过的单词数取触发器维护的行数，多个管理器实例共享同一数据
+_SQL_WORD_COUNT = "SELECT count FROM table_counts WHERE name = 'word_statistics'"
+
+# 最近N天统计与测试类型分布合并为一次查询，首列区分结果类别
+_SQL_OVERALL_BREAKDOWN = '''
+    SELECT 'recent', NULL, SUM(total_sessions), SUM(total_questions),
+           SUM(total_correct), AVG(avg_score)
+    FROM daily_stats
+    WHERE date >= ?
+    UNION ALL
+    SELECT 'type', test_type, COUNT(*), NULL, NULL, AVG(score_percentage)
+    FROM test_sessions
+    GROUP BY test_type
+'''
+
+# 写入路径上反复执行的语句，固定文本以稳定命中连接的预编译语句缓存
+_SQL_DELETE_WRONG_WORDS = 'DELETE FROM session_wrong_words WHERE session_id = ?'
+_SQL_INSERT_WRONG_WORD = 'INSERT INTO session_wrong_words (session_id, word) VALUES (?, ?)'
+_SQL_INSERT_WORD_TEST_TYPE = 'INSERT OR IGNORE INTO word_test_types (word, test_type) VALUES (?, ?)'
+_SQL_SESSION_WRONG_WORDS = '''
+    SELECT session_id, word FROM session_wrong_words
+    WHERE session_id IN (SELECT value FROM json_each(?))
+    ORDER BY rowid
+'''
+_SQL_INSERT_DAILY_TEST_TYPE = 'INSERT OR IGNORE INTO daily_test_types (date, test_type) VALUES (?, ?)'
+
+# 单条语句完成当日统计的累加
+_SQL_UPSERT_DAILY_STATS = '''
+    INSERT INTO daily_stats 
+    (date, total_sessions, total_questions, total_correct,
+     total_time_spent, avg_score)
+    VALUES (?, 1, ?, ?, ?, ?)
+    ON CONFLICT(date) DO UPDATE SET
+        total_sessions = total_sessions + 1,
+        total_questions = total_questions + excluded.total_questions,
+        total_correct = total_correct + excluded.total_correct,
+        total_time_spent = total_time_spent + excluded.total_time_spent,
+        avg_score = (avg_score * total_sessions + excluded.avg_score) / (total_sessions + 1)
+'''
+
+# 单词统计按需载入，内存中最多保留的单词数
+_WORD_CACHE_SIZE = 2048
+
+# 未保存的单词达到此数量时自动写入数据库
+_DIRTY_FLUSH_THRESHOLD = 256
+
+# 写后队列：后台线程每批最多合并的写入数与最长等待时间（秒）
+_WRITE_BEHIND_BATCH_SIZE = 64
+_WRITE_BEHIND_INTERVAL = 0.5
+
+# 单词统计查询列，测试类型从子表聚合为逗号分隔的字符串
+_SQL_SELECT_WORD_STATS = '''
+    SELECT w.word, w.total_attempts, w.correct_attempts, w.wrong_attempts,
+           w.first_seen, w.last_seen, w.avg_response_time, w.mastery_level,
+           w.consecutive_correct, w.consecutive_wrong,
+           (SELECT group_concat(t.test_type) FROM word_test_types t
+            WHERE t.word = w.word)
+    FROM word_statistics w
+'''
+
+# 正确率阈值用整数比较，避免浮点误差；部分索引idx_word_stats_weak覆盖过滤条件
+_SQL_WEAK_WORDS = _SQL_SELECT_WORD_STATS + '''
+    WHERE w.total_attempts >= 3 AND w.correct_attempts * 100 < w.total_attempts * 60
+    ORDER BY w.correct_attempts * 1.0 / w.total_attempts ASC
+    LIMIT ?
+'''
+
+_SQL_MASTERED_WORDS = _SQL_SELECT_WORD_STATS + '''
+    WHERE w.mastery_level >= 4 AND w.correct_attempts * 100 >= w.total_attempts * 80
+    ORDER BY w.mastery_level DESC, w.correct_attempts * 1.0 / w.total_attempts DESC
+    LIMIT ?
+'''
+
+# 数据库模式版本（PRAGMA user_version），已是最新版本的库启动时跳过全部建表语句
+# 版本1: 错误单词与测试类型移入子表，低于此版本的库需从旧JSON列迁移
+# 版本2: 建表与索引合并为一个脚本
+# 版本3: 由触发器维护的table_counts行数表，低于此版本的库需统计一次现有行数
+# 版本4: 删除与复合索引前缀或主键重复的索引
+# 版本5: 由触发器维护的session_totals会话总计，低于此版本的库需汇总一次现有会话
+_SCHEMA_VERSION = 5
+_NORMALIZED_SCHEMA_VERSION = 1
+_TABLE_COUNTS_SCHEMA_VERSION = 3
+_SESSION_TOTALS_SCHEMA_VERSION = 5
+
+# 由table_counts维护行数的表
+_COUNTED_TABLES = (
+    'test_sessions', 'word_statistics', 'daily_stats',
+    'session_wrong_words', 'word_test_types', 'daily_test_types',
+)
+
+# 全部表与索引
+_SQL_SCHEMA = '''
+-- 测试会话表
+CREATE TABLE IF NOT EXISTS test_sessions (
+    session_id TEXT PRIMARY KEY,
+    test_type TEXT NOT NULL,
+    test_module TEXT,
+    start_time REAL NOT NULL,
+    end_time REAL NOT NULL,
+    total_questions INTEGER NOT NULL,
+    correct_answers INTEGER NOT NULL,
+    score_percentage REAL NOT NULL,
+    time_spent REAL NOT NULL,
+    avg_time_per_question REAL NOT NULL,
+    wrong_words TEXT,  -- 旧版JSON字符串，已迁移至session_wrong_words
+    test_mode TEXT,
+    difficulty_level TEXT DEFAULT 'normal'
+);
+
+-- 单词统计表
+CREATE TABLE IF NOT EXISTS word_statistics (
+    word TEXT PRIMARY KEY,
+    total_attempts INTEGER DEFAULT 0,
+    correct_attempts INTEGER DEFAULT 0,
+    wrong_attempts INTEGER DEFAULT 0,
+    first_seen REAL DEFAULT 0,
+    last_seen REAL DEFAULT 0,
+    avg_response_time REAL DEFAULT 0,
+    mastery_level INTEGER DEFAULT 0,
+    consecutive_correct INTEGER DEFAULT 0,
+    consecutive_wrong INTEGER DEFAULT 0,
+    test_types TEXT DEFAULT '[]'  -- 旧版JSON字符串，已迁移至word_test_types
+);
+
+-- 每日统计表
+CREATE TABLE IF NOT EXISTS daily_stats (
+    date TEXT PRIMARY KEY,  -- YYYY-MM-DD格式
+    total_sessions INTEGER DEFAULT 0,
+    total_questions INTEGER DEFAULT 0,
+    total_correct INTEGER DEFAULT 0,
+    total_time_spent REAL DEFAULT 0,
+    avg_score REAL DEFAULT 0,
+    test_types TEXT DEFAULT '[]'  -- 旧版JSON字符串，已迁移至daily_test_types
+);
+
+-- 会话错误单词表（按rowid保持原顺序）
+CREATE TABLE IF NOT EXISTS session_wrong_words (
+    session_id TEXT NOT NULL,
+    word TEXT NOT NULL
+);
+
+-- 单词出现过的测试类型表
+CREATE TABLE IF NOT EXISTS word_test_types (
+    word TEXT NOT NULL,
+    test_type TEXT NOT NULL,
+    PRIMARY KEY (word, test_type)
+);
+
+-- 每日测试类型表
+CREATE TABLE IF NOT EXISTS daily_test_types (
+    date TEXT NOT NULL,
+    test_type TEXT NOT NULL,
+    PRIMARY KEY (date, test_type)
+);
+
+-- test_sessions表索引：时间范围、类型+时间（前缀也用于只按类型的查询）、分数
+CREATE INDEX IF NOT EXISTS idx_test_sessions_start_time ON test_sessions(start_time);
+CREATE INDEX IF NOT EXISTS idx_test_sessions_type_time ON test_sessions(test_type, start_time);
+CREATE INDEX IF NOT EXISTS idx_test_sessions_score ON test_sessions(score_percentage);
+
+-- word_statistics表索引：掌握程度、最后见过时间（复习计划）、正确率、总尝试次数
+CREATE INDEX IF NOT EXISTS idx_word_stats_mastery ON word_statistics(mastery_level);
+CREATE INDEX IF NOT EXISTS idx_word_stats_last_seen ON word_statistics(last_seen);
+CREATE INDEX IF NOT EXISTS idx_word_stats_accuracy ON word_statistics(correct_attempts, total_attempts);
+CREATE INDEX IF NOT EXISTS idx_word_stats_attempts ON word_statistics(total_attempts);
+
+-- 薄弱单词筛选的部分索引（只收录尝试3次以上的单词）
+CREATE INDEX IF NOT EXISTS idx_word_stats_weak ON word_statistics(total_attempts, correct_attempts)
+    WHERE total_attempts >= 3;
+
+-- session_wrong_words表索引：按会话取错误单词、按单词查询出错的会话
+CREATE INDEX IF NOT EXISTS idx_session_wrong_words_session ON session_wrong_words(session_id);
+CREATE INDEX IF NOT EXISTS idx_session_wrong_words_word ON session_wrong_words(word);
+
+-- word_test_types表索引：按测试类型查询练习过的单词
+CREATE INDEX IF NOT EXISTS idx_word_test_types_type ON word_test_types(test_type);
+
+-- daily_stats表索引：平均分数（日期查询直接走主键）
+CREATE INDEX IF NOT EXISTS idx_daily_stats_avg_score ON daily_stats(avg_score);
+
+-- 与复合索引前缀或主键重复的旧索引，只增加写入开销
+DROP INDEX IF EXISTS idx_test_sessions_test_type;
+DROP INDEX IF EXISTS idx_daily_stats_date;
+DROP INDEX IF EXISTS idx_daily_stats_date_sessions;
+
+-- 各表行数，插入/删除时由触发器更新，查询行数无需全表扫描
+CREATE TABLE IF NOT EXISTS table_counts (
+    name TEXT PRIMARY KEY,
+    count INTEGER NOT NULL DEFAULT 0
+);
+''' + ''.join(f'''
+CREATE TRIGGER IF NOT EXISTS trg_{table}_count_insert AFTER INSERT ON {table}
+BEGIN UPDATE table_counts SET count = count + 1 WHERE name = '{table}'; END;
+CREATE TRIGGER IF NOT EXISTS trg_{table}_count_delete AFTER DELETE ON {table}
+BEGIN UPDATE table_counts SET count = count - 1 WHERE name = '{table}'; END;
+''' for table in _COUNTED_TABLES) + '''
+-- 会话总计（单行），随test_sessions的插入/更新/删除由触发器调整，启动时无需扫描会话表
+CREATE TABLE IF NOT EXISTS session_totals (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    sessions INTEGER NOT NULL DEFAULT 0,
+    questions INTEGER NOT NULL DEFAULT 0,
+    correct INTEGER NOT NULL DEFAULT 0,
+    score_sum REAL NOT NULL DEFAULT 0,
+    time_spent REAL NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO session_totals (id) VALUES (0);
+CREATE TRIGGER IF NOT EXISTS trg_test_sessions_totals_insert AFTER INSERT ON test_sessions
+BEGIN
+    UPDATE session_totals SET
+        sessions = sessions + 1,
+        questions = questions + NEW.total_questions,
+        correct = correct + NEW.correct_answers,
+        score_sum = score_sum + NEW.score_percentage,
+        time_spent = time_spent + NEW.time_spent
+    WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_test_sessions_totals_update AFTER UPDATE ON test_sessions
+BEGIN
+    UPDATE session_totals SET
+        questions = questions - OLD.total_questions + NEW.total_questions,
+        correct = correct - OLD.correct_answers + NEW.correct_answers,
+        score_sum = score_sum - OLD.score_percentage + NEW.score_percentage,
+        time_spent = time_spent - OLD.time_spent + NEW.time_spent
+    WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_test_sessions_totals_delete AFTER DELETE ON test_sessions
+BEGIN
+    UPDATE session_totals SET
+        sessions = sessions - 1,
+        questions = questions - OLD.total_questions,
+        correct = correct - OLD.correct_answers,
+        score_sum = score_sum - OLD.score_percentage,
+        time_spent = time_spent - OLD.time_spent
+    WHERE id = 0;
+END;
+'''
+
+_SQL_INIT_SESSION_TOTALS = '''
+INSERT OR REPLACE INTO session_totals (id, sessions, questions, correct, score_sum, time_spent)
+    SELECT 0, COUNT(*), COALESCE(SUM(total_questions), 0), COALESCE(SUM(correct_answers), 0),
+           COALESCE(SUM(score_percentage), 0), COALESCE(SUM(time_spent), 0)
+    FROM test_sessions;
+'''
+
+_SQL_INIT_TABLE_COUNTS = ''.join(
+    f"INSERT OR REPLACE INTO table_counts (name, count) SELECT '{table}', COUNT(*) FROM {table};"
+    for table in _COUNTED_TABLES
+)
+
+_SQL_NORMALIZE_MIGRATION = '''
+INSERT INTO session_wrong_words (session_id, word)
+    SELECT s.session_id, j.value
+    FROM test_sessions s, json_each(s.wrong_words) j
+    WHERE json_valid(s.wrong_words)
+    ORDER BY s.session_id, j.key;
+INSERT OR IGNORE INTO word_test_types (word, test_type)
+    SELECT w.word, j.value
+    FROM word_statistics w, json_each(w.test_types) j
+    WHERE json_valid(w.test_types);
+INSERT OR IGNORE INTO daily_test_types (date, test_type)
+    SELECT d.date, j.value
+    FROM daily_stats d, json_each(d.test_types) j
+    WHERE json_valid(d.test_types);
+'''
+
+
+@dataclass(slots=True)
 class TestSession:
     """测试会话记录"""
     session_id: str
@@ -35,9 +351,17 @@ class TestSession:
     wrong_words: List[str]  # 错误单词列表
     test_mode: str  # 测试模式：'en_to_zh', 'zh_to_en', 'mixed'
     difficulty_level: str = "normal"  # 难度级别
+    
+    _FIELDS = ('session_id', 'test_type', 'test_module', 'start_time', 'end_time',
+               'total_questions', 'correct_answers', 'score_percentage', 'time_spent',
+               'avg_time_per_question', 'wrong_words', 'test_mode', 'difficulty_level')
+    _GETTER = attrgetter(*_FIELDS)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(zip(self._FIELDS, self._GETTER(self)))
 
 
-@dataclass
+@dataclass(slots=True)
 class WordStatistics:
     """单词统计"""
     word: str
@@ -50,53 +374,94 @@ class WordStatistics:
     mastery_level: int = 0  # 掌握程度 0-5
     consecutive_correct: int = 0
     consecutive_wrong: int = 0
-    test_types: List[str] = None  # 在哪些测试类型中出现过
+    test_types: Set[str] = None  # 在哪些测试类型中出现过
+    accuracy_rate: float = field(default=0.0, init=False)  # 正确率，随尝试记录更新
+    
+    # word_statistics表中的列，与_SQL_SAVE_WORD_STATS的参数顺序一致
+    _ROW_FIELDS = ('word', 'total_attempts', 'correct_attempts', 'wrong_attempts',
+                   'first_seen', 'last_seen', 'avg_response_time', 'mastery_level',
+                   'consecutive_correct', 'consecutive_wrong')
+    _ROW_GETTER = attrgetter(*_ROW_FIELDS)
+    _FIELDS = _ROW_FIELDS + ('test_types', 'accuracy_rate')
+    _GETTER = attrgetter(*_FIELDS)
     
     def __post_init__(self):
-        if self.test_types is None:
-            self.test_types = []
-    
-    @property
-    def accuracy_rate(self) -> float:
-        """正确率"""
-        if self.total_attempts == 0:
-            return 0.0
-        return (self.correct_attempts / self.total_attempts) * 100
-    
-    def update_attempt(self, is_correct: bool, response_time: float, test_type: str):
-        """更新尝试记录"""
-        current_time = time.time()
+        self.test_types = set(self.test_types) if self.test_types else set()
+        if self.total_attempts:
+            self.accuracy_rate = (self.correct_attempts / self.total_attempts) * 100
+    
+    def as_row(self) -> tuple:
+        """按_ROW_FIELDS顺序返回字段值元组"""
+        return self._ROW_GETTER(self)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(zip(self._FIELDS, self._GETTER(self)))
+    
+    def update_attempt(self, is_correct: bool, response_time: float, test_type: str,
+                       timestamp: Optional[float] = None):
+        """更新尝试记录；批量记录时可传入共用的时间戳"""
+        current_time = time.time() if timestamp is None else timestamp
         
         if self.first_seen == 0:
             self.first_seen = current_time
         self.last_seen = current_time
         
-        self.total_attempts += 1
+        total_attempts = self.total_attempts + 1
+        self.total_attempts = total_attempts
         
         if is_correct:
             self.correct_attempts += 1
-            self.consecutive_correct += 1
+            consecutive_correct = self.consecutive_correct + 1
+            self.consecutive_correct = consecutive_correct
             self.consecutive_wrong = 0
             # 正确回答提升掌握程度
-            if self.consecutive_correct >= 3:
-                self.mastery_level = min(5, self.mastery_level + 1)
+            if consecutive_correct >= 3 and self.mastery_level < 5:
+                self.mastery_level += 1
         else:
             self.wrong_attempts += 1
-            self.consecutive_wrong += 1
+            consecutive_wrong = self.consecutive_wrong + 1
+            self.consecutive_wrong = consecutive_wrong
             self.consecutive_correct = 0
             # 错误回答降低掌握程度
-            if self.consecutive_wrong >= 2:
-                self.mastery_level = max(0, self.mastery_level - 1)
+            if consecutive_wrong >= 2 and self.mastery_level > 0:
+                self.mastery_level -= 1
         
-        # 更新平均响应时间
-        if self.avg_response_time == 0:
-            self.avg_response_time = response_time
-        else:
-            self.avg_response_time = (self.avg_response_time * (self.total_attempts - 1) + response_time) / self.total_attempts
+        # 增量更新平均响应时间，避免累乘总和带来的误差
+        self.avg_response_time += (response_time - self.avg_response_time) / total_attempts
+        
+        self.accuracy_rate = (self.correct_attempts / total_attempts) * 100
         
         # 记录测试类型
-        if test_type not in self.test_types:
-            self.test_types.append(test_type)
+        self.test_types.add(test_type)
+
+
+def _word_stats_from_row(row: tuple) -> 'WordStatistics':
+    """由_SQL_SELECT_WORD_STATS的查询行构造单词统计"""
+    return WordStatistics(
+        word=row[0],
+        total_attempts=row[1],
+        correct_attempts=row[2],
+        wrong_attempts=row[3],
+        first_seen=row[4],
+        last_seen=row[5],
+        avg_response_time=row[6],
+        mastery_level=row[7],
+        consecutive_correct=row[8],
+        consecutive_wrong=row[9],
+        test_types=row[10].split(',') if row[10] else None
+    )
+
+
+def _days_ago_key(days: int) -> str:
+    """N天前的本地日期键（YYYY-MM-DD）"""
+    return time.strftime('%Y-%m-%d', time.localtime(time.time() - days * 86400))
+
+
+def _dumps_nested(value: Any, level: int) -> str:
+    """按indent=2序列化嵌套在第level层的值，与整体json.dump的排版一致"""
+    # 测试类型集合按排序后的列表导出
+    text = json.dumps(value, indent=2, ensure_ascii=False, default=sorted)
+    return text.replace('\n', '\n' + '  ' * level)
 
 
 class LearningStatsManager:
@@ -108,155 +473,73 @@ class LearningStatsManager:
         # 确保数据目录存在
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
         
+        # 长连接复用，保留SQLite页缓存并省去每次调用的打开/关闭开销；autocommit模式下显式控制事务
+        self._conn = sqlite3.connect(
+            self.db_path, check_same_thread=False, isolation_level=None, cached_statements=256
+        )
+        self._lock = threading.Lock()
+        # 后台写入线程复用同一个游标
+        self._write_cursor = self._conn.cursor()
+        
         # 初始化数据库
         self._init_database()
         
-        # 内存缓存
-        self._word_stats_cache: Dict[str, WordStatistics] = {}
-        self._cache_dirty = False
+        # 单词统计LRU缓存，按需从数据库载入
+        self._word_stats_cache: "OrderedDict[str, WordStatistics]" = OrderedDict()
+        # 自上次保存以来有变化的单词，保存时只写入这些行
+        self._dirty_words: Set[str] = set()
+        # 已入队但尚未提交的单词快照 (行, 测试类型)，缓存未命中时据此恢复，无需等待写入
+        self._pending_words: Dict[str, Tuple[tuple, Tuple[str, ...]]] = {}
+        self._pending_lock = threading.Lock()
+        
+        # 最近一次计算的日期键及其所在本地自然日的时间范围 [start, end)
+        self._day_key_cache = (0.0, 0.0, '')
         
-        # 载入单词统计
-        self._load_word_stats()
+        
+        # 会话记录与单词统计由后台线程合并写入，答题路径不等待提交
+        self._write_queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._writer_thread = threading.Thread(target=self._write_behind_loop, daemon=True)
+        self._writer_thread.start()
+        # 进程退出时写入未保存的统计并关闭连接
+        self._closed = False
+        atexit.register(self.close)
     
     def _init_database(self):
         """初始化数据库表"""
         with self._get_db_connection() as conn:
-            cursor = conn.cursor()
-            
-            # 测试会话表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS test_sessions (
-                    session_id TEXT PRIMARY KEY,
-                    test_type TEXT NOT NULL,
-                    test_module TEXT,
-                    start_time REAL NOT NULL,
-                    end_time REAL NOT NULL,
-                    total_questions INTEGER NOT NULL,
-                    correct_answers INTEGER NOT NULL,
-                    score_percentage REAL NOT NULL,
-                    time_spent REAL NOT NULL,
-                    avg_time_per_question REAL NOT NULL,
-                    wrong_words TEXT,  -- JSON字符串
-                    test_mode TEXT,
-                    difficulty_level TEXT DEFAULT 'normal'
-                )
-            ''')
-            
-            # 单词统计表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS word_statistics (
-                    word TEXT PRIMARY KEY,
-                    total_attempts INTEGER DEFAULT 0,
-                    correct_attempts INTEGER DEFAULT 0,
-                    wrong_attempts INTEGER DEFAULT 0,
-                    first_seen REAL DEFAULT 0,
-                    last_seen REAL DEFAULT 0,
-                    avg_response_time REAL DEFAULT 0,
-                    mastery_level INTEGER DEFAULT 0,
-                    consecutive_correct INTEGER DEFAULT 0,
-                    consecutive_wrong INTEGER DEFAULT 0,
-                    test_types TEXT DEFAULT '[]'  -- JSON字符串
-                )
-            ''')
-            
-            # 每日统计表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS daily_stats (
-                    date TEXT PRIMARY KEY,  -- YYYY-MM-DD格式
-                    total_sessions INTEGER DEFAULT 0,
-                    total_questions INTEGER DEFAULT 0,
-                    total_correct INTEGER DEFAULT 0,
-                    total_time_spent REAL DEFAULT 0,
-                    avg_score REAL DEFAULT 0,
-                    test_types TEXT DEFAULT '[]'  -- JSON字符串
-                )
+            # WAL模式下提交无需每次fsync，读取统计时也不会被写入阻塞
+            conn.executescript('''
+                PRAGMA journal_mode=WAL;
+                PRAGMA synchronous=NORMAL;
+                PRAGMA busy_timeout=5000;
+                PRAGMA wal_autocheckpoint=1000;
+                PRAGMA temp_store=MEMORY;
+                PRAGMA cache_size=-64000;
+                PRAGMA mmap_size=268435456;
             ''')
             
-            # 创建性能优化索引
-            self._create_indexes(cursor)
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+            if version >= _SCHEMA_VERSION:
+                return
             
-            conn.commit()
-    
-    def _create_indexes(self, cursor):
-        """创建数据库索引以优化查询性能"""
-        try:
-            # test_sessions表索引
-            # 按测试类型查询的索引
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_test_sessions_test_type 
-                ON test_sessions(test_type)
-            ''')
-            
-            # 按时间范围查询的索引
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_test_sessions_start_time 
-                ON test_sessions(start_time)
-            ''')
-            
-            # 复合索引：测试类型 + 开始时间（用于按类型和时间过滤）
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_test_sessions_type_time 
-                ON test_sessions(test_type, start_time)
-            ''')
-            
-            # 分数查询索引
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_test_sessions_score 
-                ON test_sessions(score_percentage)
-            ''')
-            
-            # word_statistics表索引
-            # 按掌握程度查询的索引
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_word_stats_mastery 
-                ON word_statistics(mastery_level)
-            ''')
-            
-            # 按最后见过时间查询的索引（用于复习计划）
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_word_stats_last_seen 
-                ON word_statistics(last_seen)
-            ''')
-            
-            # 按正确率查询的索引（困难词汇筛选）
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_word_stats_accuracy 
-                ON word_statistics(correct_attempts, total_attempts)
-            ''')
-            
-            # 按总尝试次数查询的索引
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_word_stats_attempts 
-                ON word_statistics(total_attempts)
-            ''')
-            
-            # daily_stats表索引
-            # 日期索引（最重要的查询条件）
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_daily_stats_date 
-                ON daily_stats(date)
-            ''')
-            
-            # 按平均分数查询的索引
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_daily_stats_avg_score 
-                ON daily_stats(avg_score)
-            ''')
-            
-            # 复合索引：日期 + 总会话数（用于活跃度分析）
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_daily_stats_date_sessions 
-                ON daily_stats(date, total_sessions)
-            ''')
-            
-            logger.info("数据库索引创建完成")
-            
-        except sqlite3.Error as e:
-            logger.warning(f"创建数据库索引时出现警告: {e}")
-            # 不抛出异常，索引创建失败不应影响应用启动
+            migration = ''
+            # 旧库的JSON列数据一次性迁移到子表
+            if version < _NORMALIZED_SCHEMA_VERSION:
+                migration += _SQL_NORMALIZE_MIGRATION
+            # 触发器只统计之后的变化，建立时先记录现有行数
+            if version < _TABLE_COUNTS_SCHEMA_VERSION:
+                migration += _SQL_INIT_TABLE_COUNTS
+            if version < _SESSION_TOTALS_SCHEMA_VERSION:
+                migration += _SQL_INIT_SESSION_TOTALS
+            conn.executescript(
+                'BEGIN;' + _SQL_SCHEMA + migration +
+                f'PRAGMA user_version={_SCHEMA_VERSION}; COMMIT;'
+            )
+            logger.info("数据库表与索引创建完成")
     
     def get_database_info(self) -> Dict[str, Any]:
         """获取数据库信息和性能统计"""
+        self.flush()
         try:
             with self._get_db_connection() as conn:
                 cursor = conn.cursor()
@@ -269,11 +552,16 @@ class LearningStatsManager:
                 cursor.execute("SELECT name FROM sqlite_master WHERE type='index'")
                 indexes = [row[0] for row in cursor.fetchall()]
                 
-                # 获取各表的记录数
+                # 获取各表的记录数，由触发器维护的直接读取
+                cursor.execute("SELECT name, count FROM table_counts")
+                maintained_counts = dict(cursor.fetchall())
                 table_counts = {}
                 for table in tables:
-                    cursor.execute(f"SELECT COUNT(*) FROM {table}")
-                    table_counts[table] = cursor.fetchone()[0]
+                    if table in maintained_counts:
+                        table_counts[table] = maintained_counts[table]
+                    else:
+                        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+                        table_counts[table] = cursor.fetchone()[0]
                 
                 # 获取数据库文件大小
                 db_size = os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0
@@ -285,7 +573,7 @@ class LearningStatsManager:
                     'indexes': indexes,
                     'table_counts': table_counts,
                     'cache_size': len(self._word_stats_cache),
-                    'cache_dirty': self._cache_dirty
+                    'cache_dirty': bool(self._dirty_words)
                 }
                 
         except Exception as e:
@@ -351,203 +639,282 @@ class LearningStatsManager:
     
     @contextmanager
     def _get_db_connection(self):
-        """获取数据库连接的上下文管理器"""
-        conn = sqlite3.connect(self.db_path)
-        try:
-            yield conn
-        finally:
-            conn.close()
+        """获取数据库连接的上下文管理器（持有锁期间独占长连接）"""
+        with self._lock:
+            yield self._conn
     
-    def _load_word_stats(self):
-        """从数据库载入单词统计"""
-        try:
-            with self._get_db_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT * FROM word_statistics")
-                
-                for row in cursor.fetchall():
-                    word = row[0]
-                    test_types = json.loads(row[10]) if row[10] else []
-                    
-                    stats = WordStatistics(
-                        word=word,
-                        total_attempts=row[1],
-                        correct_attempts=row[2],
-                        wrong_attempts=row[3],
-                        first_seen=row[4],
-                        last_seen=row[5],
-                        avg_response_time=row[6],
-                        mastery_level=row[7],
-                        consecutive_correct=row[8],
-                        consecutive_wrong=row[9],
-                        test_types=test_types
-                    )
-                    
-                    self._word_stats_cache[word] = stats
-                    
-                logger.info(f"载入了 {len(self._word_stats_cache)} 个单词的统计数据")
-                
-        except Exception as e:
-            logger.error(f"载入单词统计失败: {e}")
+    def flush(self):
+        """等待所有排队的写入提交到数据库"""
+        if self._writer_thread.is_alive():
+            self._write_queue.join()
+    
+    def close(self):
+        """保存未写入的统计并关闭数据库连接"""
+        if self._closed:
+            return
+        self._closed = True
+        atexit.unregister(self.close)
+        
+        self.save_word_stats()
+        if self._writer_thread.is_alive():
+            self._write_queue.put(None)
+            self._writer_thread.join()
+        with self._lock:
+            self._conn.close()
+    
+    def _get_cached_word_stats(self, word: str) -> Optional[WordStatistics]:
+        """从LRU缓存获取单词统计，未命中时按主键从数据库载入"""
+        cache = self._word_stats_cache
+        stats = cache.get(word)
+        if stats is not None:
+            cache.move_to_end(word)
+            return stats
+        
+        # 淘汰出缓存的单词可能仍在写后队列中，此时以排队的快照为准
+        with self._pending_lock:
+            snapshot = self._pending_words.get(word)
+        if snapshot is not None:
+            row, test_types = snapshot
+            stats = WordStatistics(*row, test_types=test_types)
+        else:
+            try:
+                with self._get_db_connection() as conn:
+                    row = conn.execute(_SQL_SELECT_WORD_STATS + ' WHERE w.word = ?', (word,)).fetchone()
+            except Exception as e:
+                logger.error(f"载入单词统计失败: {e}")
+                return None
+            
+            if row is None:
+                return None
+            stats = _word_stats_from_row(row)
+        self._cache_word_stats(stats)
+        return stats
+    
+    def _cache_word_stats(self, stats: WordStatistics):
+        """放入LRU缓存；淘汰的单词若尚未保存则先写入数据库"""
+        cache = self._word_stats_cache
+        cache[stats.word] = stats
+        while len(cache) > _WORD_CACHE_SIZE:
+            if next(iter(cache)) in self._dirty_words:
+                self.save_word_stats()
+            cache.popitem(last=False)
     
     def record_test_session(self, session: TestSession):
-        """记录测试会话"""
-        try:
-            with self._get_db_connection() as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                    INSERT OR REPLACE INTO test_sessions 
-                    (session_id, test_type, test_module, start_time, end_time, 
-                     total_questions, correct_answers, score_percentage, time_spent, 
-                     avg_time_per_question, wrong_words, test_mode, difficulty_level)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    session.session_id, session.test_type, session.test_module,
-                    session.start_time, session.end_time, session.total_questions,
-                    session.correct_answers, session.score_percentage, session.time_spent,
-                    session.avg_time_per_question, json.dumps(session.wrong_words),
-                    session.test_mode, session.difficulty_level
-                ))
-                
-                conn.commit()
-                
-                # 更新每日统计
-                self._update_daily_stats(session)
-                
-                logger.info(f"记录测试会话: {session.session_id}")
-                
-        except Exception as e:
-            logger.error(f"记录测试会话失败: {e}")
+        """记录测试会话（由后台线程写入数据库）"""
+        self._write_queue.put(('session', session))
+    
+    def _write_session(self, session: TestSession, cursor: sqlite3.Cursor):
+        """在调用方的事务中写入会话记录与每日统计"""
+        cursor.execute(_SQL_INSERT_SESSION, (
+            session.session_id, session.test_type, session.test_module,
+            session.start_time, session.end_time, session.total_questions,
+            session.correct_answers, session.score_percentage, session.time_spent,
+            session.avg_time_per_question,
+            session.test_mode, session.difficulty_level
+        ))
+        # 重复记录同一会话时替换其错误单词
+        cursor.execute(_SQL_DELETE_WRONG_WORDS, (session.session_id,))
+        cursor.executemany(
+            _SQL_INSERT_WRONG_WORD,
+            [(session.session_id, word) for word in session.wrong_words]
+        )
+        
+        # 更新每日统计
+        self._update_daily_stats(session, cursor)
     
-    def record_word_attempt(self, word: str, is_correct: bool, response_time: float, test_type: str):
+    def record_word_attempt(self, word: str, is_correct: bool, response_time: float, test_type: str,
+                            timestamp: Optional[float] = None):
         """记录单词尝试"""
-        if word not in self._word_stats_cache:
-            self._word_stats_cache[word] = WordStatistics(word=word)
+        stats = self._get_cached_word_stats(word)
+        if stats is None:
+            stats = WordStatistics(word=word)
+            self._cache_word_stats(stats)
+        
+        stats.update_attempt(is_correct, response_time, test_type, timestamp)
+        self._dirty_words.add(word)
+        
+        if len(self._dirty_words) >= _DIRTY_FLUSH_THRESHOLD:
+            self.save_word_stats()
+    
+    def record_word_attempts(self, attempts: List[Tuple[str, bool, float, str]]):
+        """批量记录单词尝试，同一批次共用一个时间戳
         
-        self._word_stats_cache[word].update_attempt(is_correct, response_time, test_type)
-        self._cache_dirty = True
+        Args:
+            attempts: (word, is_correct, response_time, test_type) 元组列表
+        """
+        timestamp = time.time()
+        for word, is_correct, response_time, test_type in attempts:
+            self.record_word_attempt(word, is_correct, response_time, test_type, timestamp)
     
     def save_word_stats(self):
-        """保存单词统计到数据库"""
-        if not self._cache_dirty:
+        """保存单词统计到数据库（由后台线程写入）"""
+        if not self._dirty_words:
             return
         
-        try:
-            with self._get_db_connection() as conn:
-                cursor = conn.cursor()
-                
-                for word, stats in self._word_stats_cache.items():
-                    cursor.execute('''
-                        INSERT OR REPLACE INTO word_statistics 
-                        (word, total_attempts, correct_attempts, wrong_attempts, 
-                         first_seen, last_seen, avg_response_time, mastery_level,
-                         consecutive_correct, consecutive_wrong, test_types)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        stats.word, stats.total_attempts, stats.correct_attempts,
-                        stats.wrong_attempts, stats.first_seen, stats.last_seen,
-                        stats.avg_response_time, stats.mastery_level,
-                        stats.consecutive_correct, stats.consecutive_wrong,
-                        json.dumps(stats.test_types)
-                    ))
-                
-                conn.commit()
-                self._cache_dirty = False
-                
-                logger.info(f"保存了 {len(self._word_stats_cache)} 个单词的统计数据")
-                
-        except Exception as e:
-            logger.error(f"保存单词统计失败: {e}")
+        # 先换出脏集合，之后新增的尝试留到下次保存
+        dirty_words, self._dirty_words = self._dirty_words, set()
+        # 脏单词总在缓存中（淘汰前会先保存）；入队的是当前数值的快照
+        cache = self._word_stats_cache
+        snapshots = [
+            (stats.as_row(), tuple(stats.test_types))
+            for stats in (cache[word] for word in dirty_words)
+        ]
+        with self._pending_lock:
+            for snapshot in snapshots:
+                self._pending_words[snapshot[0][0]] = snapshot
+        self._write_queue.put(('words', snapshots))
     
-    def _update_daily_stats(self, session: TestSession):
-        """更新每日统计"""
-        try:
-            date_str = datetime.fromtimestamp(session.start_time).strftime('%Y-%m-%d')
+    def _write_behind_loop(self):
+        """后台线程：合并排队的写入并批量提交"""
+        stopping = False
+        while not stopping:
+            items = []
+            item = self._write_queue.get()
             
-            with self._get_db_connection() as conn:
-                cursor = conn.cursor()
-                
-                # 获取当前日期的统计
-                cursor.execute("SELECT * FROM daily_stats WHERE date = ?", (date_str,))
-                row = cursor.fetchone()
-                
-                if row:
-                    # 更新现有记录
-                    total_sessions = row[1] + 1
-                    total_questions = row[2] + session.total_questions
-                    total_correct = row[3] + session.correct_answers
-                    total_time_spent = row[4] + session.time_spent
-                    avg_score = (row[5] * row[1] + session.score_percentage) / total_sessions
-                    
-                    test_types = json.loads(row[6]) if row[6] else []
-                    if session.test_type not in test_types:
-                        test_types.append(session.test_type)
-                    
-                    cursor.execute('''
-                        UPDATE daily_stats 
-                        SET total_sessions = ?, total_questions = ?, total_correct = ?,
-                            total_time_spent = ?, avg_score = ?, test_types = ?
-                        WHERE date = ?
-                    ''', (total_sessions, total_questions, total_correct,
-                          total_time_spent, avg_score, json.dumps(test_types), date_str))
+            deadline = time.time() + _WRITE_BEHIND_INTERVAL
+            while True:
+                if item is None:
+                    stopping = True
                 else:
-                    # 创建新记录
-                    cursor.execute('''
-                        INSERT INTO daily_stats 
-                        (date, total_sessions, total_questions, total_correct,
-                         total_time_spent, avg_score, test_types)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    ''', (date_str, 1, session.total_questions, session.correct_answers,
-                          session.time_spent, session.score_percentage, 
-                          json.dumps([session.test_type])))
-                
-                conn.commit()
+                    items.append(item)
                 
+                if stopping or len(items) >= _WRITE_BEHIND_BATCH_SIZE:
+                    break
+                timeout = deadline - time.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._write_queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+            
+            self._write_batch(items)
+            
+            # 每个取出的元素（包括结束标记）都要标记完成
+            for _ in range(len(items) + (1 if stopping else 0)):
+                self._write_queue.task_done()
+    
+    def _write_batch(self, items: List[tuple]):
+        """在一个事务中写入一批会话记录与单词统计"""
+        if not items:
+            return
+        
+        try:
+            written_sessions, written_snapshots = self._write_items(items)
         except Exception as e:
-            logger.error(f"更新每日统计失败: {e}")
+            # 整批失败时逐项在各自的事务中重试，仍失败的项记录后丢弃，不阻塞后续写入
+            logger.error(f"批量写入学习统计失败，逐项重试: {e}")
+            written_sessions, written_snapshots = [], []
+            for item in items:
+                try:
+                    sessions, snapshots = self._write_items([item])
+                except Exception as e:
+                    logger.error(f"写入学习统计失败，已丢弃该项: {e}")
+                    if item[0] == 'words':
+                        self._release_pending(item[1])
+                    continue
+                written_sessions.extend(sessions)
+                written_snapshots.extend(snapshots)
+        
+        self._release_pending(written_snapshots)
+        
+        for session in written_sessions:
+            logger.info(f"记录测试会话: {session.session_id}")
+        if written_snapshots:
+            logger.info(f"保存了 {len(written_snapshots)} 个单词的统计数据")
+    
+    def _write_items(self, items: List[tuple]) -> Tuple[list, list]:
+        """在一个事务中写入排队的元素，返回 (已写入的会话, 已写入的单词快照)"""
+        written_sessions = []
+        written_snapshots = []
+        with self._get_db_connection() as conn:
+            with conn:
+                cursor = self._write_cursor
+                cursor.execute('BEGIN')
+                
+                for kind, *payload in items:
+                    if kind == 'session':
+                        session = payload[0]
+                        self._write_session(session, cursor)
+                        written_sessions.append(session)
+                    else:
+                        snapshots = payload[0]
+                        cursor.executemany(_SQL_SAVE_WORD_STATS, [row for row, _ in snapshots])
+                        # 测试类型只增不减，已存在的组合直接忽略
+                        cursor.executemany(_SQL_INSERT_WORD_TEST_TYPE, [
+                            (row[0], test_type)
+                            for row, test_types in snapshots
+                            for test_type in test_types
+                        ])
+                        written_snapshots.extend(snapshots)
+        return written_sessions, written_snapshots
+    
+    def _release_pending(self, snapshots: List[tuple]):
+        """移除已处理的排队快照；期间又入队了更新快照的单词保留新快照"""
+        with self._pending_lock:
+            pending = self._pending_words
+            for snapshot in snapshots:
+                word = snapshot[0][0]
+                if pending.get(word) is snapshot:
+                    del pending[word]
+    
+    def _update_daily_stats(self, session: TestSession, cursor: sqlite3.Cursor):
+        """在调用方的事务中更新每日统计"""
+        date_str = self._date_key(session.start_time)
+        cursor.execute(_SQL_UPSERT_DAILY_STATS, (
+            date_str, session.total_questions, session.correct_answers,
+            session.time_spent, session.score_percentage
+        ))
+        cursor.execute(_SQL_INSERT_DAILY_TEST_TYPE, (date_str, session.test_type))
+    
+    def _date_key(self, timestamp: float) -> str:
+        """时间戳对应的本地日期键，同一天内的会话复用上次的结果"""
+        day_start, day_end, date_str = self._day_key_cache
+        if day_start <= timestamp < day_end:
+            return date_str
+        
+        local = time.localtime(timestamp)
+        date_str = time.strftime('%Y-%m-%d', local)
+        day_start = time.mktime((local.tm_year, local.tm_mon, local.tm_mday, 0, 0, 0, 0, 0, -1))
+        day_end = time.mktime((local.tm_year, local.tm_mon, local.tm_mday + 1, 0, 0, 0, 0, 0, -1))
+        self._day_key_cache = (day_start, day_end, date_str)
+        return date_str
     
     def get_overall_stats(self) -> Dict[str, Any]:
         """获取总体统计信息"""
+        # 未保存的新单词也计入练习过的单词数
+        self.save_word_stats()
+        self.flush()
         try:
             with self._get_db_connection() as conn:
                 cursor = conn.cursor()
                 
-                # 测试会话统计
-                cursor.execute('''
-                    SELECT COUNT(*), SUM(total_questions), SUM(correct_answers),
-                           AVG(score_percentage), SUM(time_spent)
-                    FROM test_sessions
-                ''')
-                session_stats = cursor.fetchone()
+                # 最近7天统计与测试类型分布
+                cursor.execute(_SQL_OVERALL_BREAKDOWN, (_days_ago_key(7),))
                 
-                # 最近7天统计
-                seven_days_ago = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
-                cursor.execute('''
-                    SELECT SUM(total_sessions), SUM(total_questions), 
-                           SUM(total_correct), AVG(avg_score)
-                    FROM daily_stats
-                    WHERE date >= ?
-                ''', (seven_days_ago,))
-                recent_stats = cursor.fetchone()
-                
-                # 测试类型分布
-                cursor.execute('''
-                    SELECT test_type, COUNT(*), AVG(score_percentage)
-                    FROM test_sessions
-                    GROUP BY test_type
-                ''')
-                test_type_stats = cursor.fetchall()
+                recent_stats = None
+                test_type_stats = []
+                for row in cursor.fetchall():
+                    if row[0] == 'recent':
+                        recent_stats = row[2:]
+                    else:
+                        test_type_stats.append((row[1], row[2], row[5]))
+                
+                # 测试会话统计取触发器维护的单行总计，其他管理器实例记录的会话同样可见
+                row = cursor.execute(_SQL_SESSION_TOTALS).fetchone()
+                sessions, questions, correct, score_sum, time_spent = row or (0, 0, 0, 0.0, 0.0)
+                row = cursor.execute(_SQL_WORD_COUNT).fetchone()
+                word_count = row[0] if row else 0
                 
                 return {
-                    'total_sessions': session_stats[0] or 0,
-                    'total_questions': session_stats[1] or 0,
-                    'total_correct': session_stats[2] or 0,
-                    'overall_accuracy': (session_stats[2] / session_stats[1] * 100) if session_stats[1] else 0,
-                    'average_score': session_stats[3] or 0,  # 修复键名
-                    'total_time_hours': (session_stats[4] or 0) / 3600,  # 转换为小时并修复键名
+                    'total_sessions': sessions,
+                    'total_questions': questions,
+                    'total_correct': correct,
+                    'overall_accuracy': (correct / questions * 100) if questions else 0,
+                    'average_score': (score_sum / sessions) if sessions else 0,  # 修复键名
+                    'total_time_hours': time_spent / 3600,  # 转换为小时并修复键名
                     'recent_7_days_accuracy': (recent_stats[2] / recent_stats[1] * 100) if recent_stats and recent_stats[1] else 0,  # 添加最近7天准确率
-                    'vocabulary_mastery': min(100, len(self._word_stats_cache) / 100 * 100) if self._word_stats_cache else 0,  # 添加词汇熟练度
+                    'vocabulary_mastery': min(100, word_count / 100 * 100) if word_count else 0,  # 添加词汇熟练度
                     'recent_7_days': {
                         'sessions': recent_stats[0] or 0,
                         'questions': recent_stats[1] or 0,
@@ -558,7 +925,7 @@ class LearningStatsManager:
                         {'type': row[0], 'sessions': row[1], 'avg_score': row[2]}
                         for row in test_type_stats
                     ],
-                    'unique_words_practiced': len(self._word_stats_cache)
+                    'unique_words_practiced': word_count
                 }
                 
         except Exception as e:
@@ -567,58 +934,80 @@ class LearningStatsManager:
     
     def get_word_stats(self, word: str) -> Optional[WordStatistics]:
         """获取特定单词的统计"""
-        return self._word_stats_cache.get(word)
+        return self._get_cached_word_stats(word)
     
     def get_weak_words(self, limit: int = 20) -> List[Tuple[str, WordStatistics]]:
         """获取掌握程度较低的单词"""
-        weak_words = [
-            (word, stats) for word, stats in self._word_stats_cache.items()
-            if stats.total_attempts >= 3 and stats.accuracy_rate < 60
-        ]
-        
-        # 按准确率排序
-        weak_words.sort(key=lambda x: x[1].accuracy_rate)
-        return weak_words[:limit]
+        return self._query_word_stats(_SQL_WEAK_WORDS, limit, "获取薄弱单词失败")
     
     def get_mastered_words(self, limit: int = 20) -> List[Tuple[str, WordStatistics]]:
         """获取掌握程度较高的单词"""
-        mastered_words = [
-            (word, stats) for word, stats in self._word_stats_cache.items()
-            if stats.mastery_level >= 4 and stats.accuracy_rate >= 80
-        ]
+        return self._query_word_stats(_SQL_MASTERED_WORDS, limit, "获取已掌握单词失败")
+    
+    def _query_word_stats(self, query: str, limit: int, error_message: str) -> List[Tuple[str, WordStatistics]]:
+        """在数据库中筛选并排序单词统计，先写入未保存的尝试记录"""
+        self.save_word_stats()
+        self.flush()
         
-        # 按掌握程度和准确率排序
-        mastered_words.sort(key=lambda x: (x[1].mastery_level, x[1].accuracy_rate), reverse=True)
-        return mastered_words[:limit]
+        try:
+            with self._get_db_connection() as conn:
+                rows = conn.execute(query, (limit,)).fetchall()
+        except Exception as e:
+            logger.error(f"{error_message}: {e}")
+            return []
+        
+        # 缓存中已有的单词直接返回缓存对象
+        cache = self._word_stats_cache
+        return [
+            (row[0], cache.get(row[0]) or _word_stats_from_row(row))
+            for row in rows
+        ]
     
     def get_recent_sessions(self, limit: int = 10) -> List[TestSession]:
         """获取最近的测试会话"""
+        self.flush()
         try:
             with self._get_db_connection() as conn:
                 cursor = conn.cursor()
+                # 按列名取值，表结构增加列时不受影响
+                cursor.row_factory = sqlite3.Row
                 cursor.execute('''
-                    SELECT * FROM test_sessions
+                    SELECT session_id, test_type, test_module, start_time, end_time,
+                           total_questions, correct_answers, score_percentage, time_spent,
+                           avg_time_per_question, test_mode, difficulty_level
+                    FROM test_sessions
                     ORDER BY start_time DESC
                     LIMIT ?
                 ''', (limit,))
                 
+                rows = cursor.fetchall()
+                
+                # 一次查出这些会话的错误单词
+                wrong_words_by_session = defaultdict(list)
+                if rows:
+                    # 会话ID以JSON数组传入，语句文本不随数量变化，可复用预编译缓存
+                    cursor.execute(_SQL_SESSION_WRONG_WORDS, (
+                        json.dumps([row['session_id'] for row in rows]),
+                    ))
+                    for session_id, word in cursor.fetchall():
+                        wrong_words_by_session[session_id].append(word)
+                
                 sessions = []
-                for row in cursor.fetchall():
-                    wrong_words = json.loads(row[10]) if row[10] else []
+                for row in rows:
                     session = TestSession(
-                        session_id=row[0],
-                        test_type=row[1],
-                        test_module=row[2],
-                        start_time=row[3],
-                        end_time=row[4],
-                        total_questions=row[5],
-                        correct_answers=row[6],
-                        score_percentage=row[7],
-                        time_spent=row[8],
-                        avg_time_per_question=row[9],
-                        wrong_words=wrong_words,
-                        test_mode=row[11],
-                        difficulty_level=row[12]
+                        session_id=row['session_id'],
+                        test_type=row['test_type'],
+                        test_module=row['test_module'],
+                        start_time=row['start_time'],
+                        end_time=row['end_time'],
+                        total_questions=row['total_questions'],
+                        correct_answers=row['correct_answers'],
+                        score_percentage=row['score_percentage'],
+                        time_spent=row['time_spent'],
+                        avg_time_per_question=row['avg_time_per_question'],
+                        wrong_words=wrong_words_by_session.get(row['session_id'], []),
+                        test_mode=row['test_mode'],
+                        difficulty_level=row['difficulty_level']
                     )
                     sessions.append(session)
                 
@@ -630,20 +1019,25 @@ class LearningStatsManager:
     
     def get_daily_stats(self, days: int = 30) -> List[Dict[str, Any]]:
         """获取每日统计（最近N天）"""
+        self.flush()
         try:
-            start_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+            start_date = _days_ago_key(days)
             
             with self._get_db_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
-                    SELECT * FROM daily_stats
-                    WHERE date >= ?
-                    ORDER BY date DESC
+                    SELECT d.date, d.total_sessions, d.total_questions, d.total_correct,
+                           d.total_time_spent, d.avg_score,
+                           (SELECT group_concat(t.test_type) FROM daily_test_types t
+                            WHERE t.date = d.date)
+                    FROM daily_stats d
+                    WHERE d.date >= ?
+                    ORDER BY d.date DESC
                 ''', (start_date,))
                 
                 daily_stats = []
                 for row in cursor.fetchall():
-                    test_types = json.loads(row[6]) if row[6] else []
+                    test_types = row[6].split(',') if row[6] else []
                     accuracy = (row[3] / row[2] * 100) if row[2] > 0 else 0
                     
                     daily_stats.append({
@@ -664,20 +1058,33 @@ class LearningStatsManager:
             return []
     
     def export_data(self, export_path: str):
-        """导出学习数据"""
+        """导出学习数据（单词统计逐行写入，不在内存中构建完整导出）"""
         try:
-            export_data = {
-                'export_time': datetime.now().isoformat(),
-                'overall_stats': self.get_overall_stats(),
-                'recent_sessions': [asdict(session) for session in self.get_recent_sessions(100)],
-                'word_statistics': {
-                    word: asdict(stats) for word, stats in self._word_stats_cache.items()
-                },
-                'daily_stats': self.get_daily_stats(90)
-            }
+            self.save_word_stats()
+            self.flush()
+            export_time = datetime.now().isoformat()
+            overall_stats = self.get_overall_stats()
+            recent_sessions = [session.to_dict() for session in self.get_recent_sessions(100)]
+            daily_stats = self.get_daily_stats(90)
             
             with open(export_path, 'w', encoding='utf-8') as f:
-                json.dump(export_data, f, indent=2, ensure_ascii=False)
+                f.write('{\n')
+                f.write(f'  "export_time": {_dumps_nested(export_time, 1)},\n')
+                f.write(f'  "overall_stats": {_dumps_nested(overall_stats, 1)},\n')
+                f.write(f'  "recent_sessions": {_dumps_nested(recent_sessions, 1)},\n')
+                
+                # 导出全部单词，而不仅是缓存中的部分
+                f.write('  "word_statistics": {')
+                first = True
+                with self._get_db_connection() as conn:
+                    for row in conn.execute(_SQL_SELECT_WORD_STATS):
+                        stats = _word_stats_from_row(row)
+                        f.write('\n    ' if first else ',\n    ')
+                        f.write(f'{_dumps_nested(stats.word, 2)}: {_dumps_nested(stats.to_dict(), 2)}')
+                        first = False
+                f.write('},\n' if first else '\n  },\n')
+                
+                f.write(f'  "daily_stats": {_dumps_nested(daily_stats, 1)}\n}}')
             
             logger.info(f"学习数据已导出到: {export_path}")
             return True
@@ -686,13 +1093,13 @@ class LearningStatsManager:
             logger.error(f"导出学习数据失败: {e}")
             return False
     
-    def __del__(self):
-        """析构函数，确保保存数据"""
-        if hasattr(self, '_cache_dirty') and self._cache_dirty:
-            try:
-                self.save_word_stats()
-            except:
-                pass
+    def __enter__(self) -> 'LearningStatsManager':
+        """支持with语句使用"""
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        """退出with块时写入剩余统计并关闭连接"""
+        self.close()
 
 
 # 全局统计管理器实例
@@ -701,6 +1108,6 @@ _global_stats_manager = None
 def get_learning_stats_manager() -> LearningStatsManager:
     """获取全局学习统计管理器实例"""
     global _global_stats_manager
-    if _global_stats_manager is None:
+    if _global_stats_manager is None or _global_stats_manager._closed:
         _global_stats_manager = LearningStatsManager()
     return _global_stats_manager
\ No newline at end of file